@@ -0,0 +1,199 @@
+import argparse
+import ast
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows has no getrusage; RSS is then reported as None
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mutation_engine import DEFAULT_RUNNER, run_mutants
+from mutation_operators import MutationTransformer, mutation_operators, patch_tree
+from mutation_sites import iter_mutants
+
+
+# Synthetic target in the style of original_code.py: chains of `depth`
+# classes where every subclass calls super().__init__, adds a private field
+# and overrides every method of its parent
+def synthetic_target(classes, depth=3, methods=3):
+    lines = []
+    for chain in range(max(1, classes // depth)):
+        for level in range(depth):
+            name = f"Class{chain}_{level}"
+            params = ["self", "name", "age"] + [f"extra{i}" for i in range(level)]
+            lines.append(f"class {name}({f'Class{chain}_{level - 1}' if level else ''}):")
+            lines.append(f"    def __init__({', '.join(params)}):")
+            if level:
+                lines.append(f"        super().__init__({', '.join(params[1:-1])})")
+                lines.append(f"        self._extra{level - 1} = extra{level - 1}")
+            else:
+                lines.append("        self.name = name")
+                lines.append("        self._age = age")
+            for method in range(methods):
+                lines.append("")
+                lines.append(f"    def method{method}(self):")
+                lines.append(f"        return f'{{self.name}} {name}.method{method} {{self._age}}'")
+            lines.append("")
+            lines.append("")
+    return "\n".join(lines)
+
+
+# A test module for the synthetic target with one assertion per class and
+# method, using the values the unmutated target returns
+def synthetic_tests(target_source, module_name):
+    namespace = {}
+    exec(compile(target_source, module_name, "exec"), namespace)
+    lines = ["import unittest", "", f"from {module_name} import *", "", "", "class TestSynthetic(unittest.TestCase):"]
+    for name, value in namespace.items():
+        if not isinstance(value, type):
+            continue
+        extras = list(range(value.__init__.__code__.co_argcount - 3))
+        args = ["'n'", "1"] + [str(extra) for extra in extras]
+        instance = value("n", 1, *extras)
+        for method in sorted(attr for attr in vars(value) if attr.startswith("method")):
+            lines.append(f"    def test_{name}_{method}(self):")
+            lines.append(f"        self.assertEqual({name}({', '.join(args)}).{method}(), "
+                         f"{getattr(instance, method)()!r})")
+            lines.append("")
+    return "\n".join(lines)
+
+
+def _rate(count, seconds):
+    return {"mutants": count, "seconds": seconds,
+            "mutants_per_second": count / seconds if seconds else None,
+            "ms_per_mutant": seconds * 1000 / count if count else None}
+
+
+# Peak resident set size in KB of this process and of the worker processes
+# it has reaped, or None where getrusage is missing
+def _peak_rss_kb():
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and in KB elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+# Run one operator's measurement in a freshly spawned process, so the peak RSS
+# it reports belongs to that operator alone: a forked process would start from
+# the parent's high-water mark and the same process would keep the largest
+# peak of every operator before it
+def _measure_apart(function, *args):
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(function, *args).result()
+
+
+def _generate(source_code, operator):
+    start = time.perf_counter()
+    tree = ast.parse(source_code)
+    sites = MutationTransformer([operator]).collect_sites(tree)
+    for site in sites:
+        patch_tree(tree, [site])
+    return {**_rate(len(sites), time.perf_counter() - start), "peak_rss_kb": _peak_rss_kb()}
+
+
+def _execute(directory, source_code, operator, tests, test_module, module_name, runner, workers):
+    sys.path.insert(0, directory)
+    jobs = ((mutant.id, tests, mutant.tree()) for mutant in iter_mutants(source_code, [operator], cache_dir=None))
+    start = time.perf_counter()
+    outcomes = list(run_mutants(jobs, runner, workers, None, test_module, None, module_name))
+    # Workers and forked children are all reaped by now, so their peaks count
+    return {**_rate(len(outcomes), time.perf_counter() - start), "peak_rss_kb": _peak_rss_kb()}
+
+
+# Generation: parse, one MutationTransformer walk and one patched tree per
+# mutant, per operator. peak_rss_kb includes the interpreter and imports of
+# the measuring process
+def bench_generation(source_code, operators):
+    return {operator: _measure_apart(_generate, source_code, operator) for operator in operators}
+
+
+# Execution: every mutant of each operator against every test, in workers.
+# peak_rss_kb is the largest of the measuring process and its workers
+def bench_execution(directory, source_code, operators, test_module, module_name, runner, workers):
+    import mutation_coverage
+    tests = list(mutation_coverage.collect_coverage(source_code, test_module, module_name))
+    return {operator: _measure_apart(_execute, directory, source_code, operator, tests, test_module, module_name,
+                                     runner, workers)
+            for operator in operators}
+
+
+def run_benchmarks(sizes, operators, runner, workers, execute):
+    directory = tempfile.mkdtemp(prefix="mutation_bench_")
+    sys.path.insert(0, directory)
+    report = {}
+    for size in sizes:
+        module_name, test_module = f"bench_target_{size}", f"bench_tests_{size}"
+        source_code = synthetic_target(size)
+        with open(os.path.join(directory, f"{module_name}.py"), "w") as f:
+            f.write(source_code)
+        with open(os.path.join(directory, f"{test_module}.py"), "w") as f:
+            f.write(synthetic_tests(source_code, module_name))
+        print(f"size {size}: {source_code.count(chr(10))} lines", file=sys.stderr)
+        report[str(size)] = {"generation": bench_generation(source_code, operators)}
+        if execute:
+            report[str(size)]["execution"] = bench_execution(directory, source_code, operators, test_module,
+                                                             module_name, runner, workers)
+    return report
+
+
+# Compare ms per mutant against a saved baseline; a phase is flagged when it
+# got slower than the baseline by more than `threshold` (0.2 = 20%)
+def compare(report, baseline, threshold):
+    regressions = []
+    for size, phases in report.items():
+        for phase, operators in phases.items():
+            for operator, stats in operators.items():
+                before = baseline.get(size, {}).get(phase, {}).get(operator, {}).get("ms_per_mutant")
+                after = stats["ms_per_mutant"]
+                if before and after and after > before * (1 + threshold):
+                    regressions.append(f"size {size} {phase} {operator}: {before:.3f} -> {after:.3f} ms/mutant")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark mutant generation and execution throughput")
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")], default=[12, 48, 192],
+                        help="comma separated number of classes in the synthetic targets")
+    parser.add_argument("--operators", type=lambda value: value.split(","), default=list(mutation_operators))
+    parser.add_argument("--runner", default=DEFAULT_RUNNER)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-execute", dest="execute", action="store_false", help="only benchmark generation")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", default=os.path.join(os.path.dirname(__file__), "baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before flagging, 0.2 = 20%%")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.operators, args.runner, args.workers, args.execute)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            f.write(text)
+        return 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
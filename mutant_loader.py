@@ -0,0 +1,262 @@
+import ast
+import importlib
+import sys
+import types
+
+
+# Compile a mutated AST (or source string) straight into a fresh module
+# object without touching the filesystem or rendering source. Trees from
+# patch_tree already carry locations on the nodes they changed; only a tree
+# built some other way pays for fixing the locations of the whole module.
+# package sets __package__, so relative imports in a package module resolve
+def load_mutant(tree, module_name="mutant", package=None):
+    module = types.ModuleType(module_name)
+    module.__file__ = f"<{module_name}>"
+    if package is not None:
+        module.__package__ = package
+    try:
+        code = compile(tree, module.__file__, "exec")
+    except TypeError:
+        if not isinstance(tree, ast.AST):
+            raise
+        code = compile(ast.fix_missing_locations(tree), module.__file__, "exec")
+    exec(code, module.__dict__)
+    # Later imports of the module name see this mutant, not mutant.py on disk
+    sys.modules[module_name] = module
+    return module
+
+
+# Names a top-level statement binds in the module namespace
+def bound_names(statement):
+    if isinstance(statement, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+        return {statement.name}
+    if isinstance(statement, (ast.Import, ast.ImportFrom)):
+        return {(alias.asname or alias.name).split(".")[0] for alias in statement.names}
+    return {node.id for node in ast.walk(statement) if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store)}
+
+
+# Names a top-level statement reads, including inside its nested bodies
+def _loaded_names(statement):
+    return {node.id for node in ast.walk(statement) if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load)}
+
+
+# The unmutated module of a module name, with what each of its top-level
+# statements binds and reads, and their code objects compiled on first use
+class _Baseline:
+    def __init__(self, tree, module):
+        self.tree = tree
+        self.module = module
+        self.bound = [bound_names(statement) for statement in tree.body]
+        self.loaded = [_loaded_names(statement) for statement in tree.body]
+        self.code = {}
+
+    def statement_code(self, index):
+        if index not in self.code:
+            self.code[index] = _compile_statement(self.tree.body[index], self.module.__file__)
+        return self.code[index]
+
+
+_baselines = {}
+
+
+def _compile_statement(statement, filename):
+    return compile(ast.Module(body=[statement], type_ignores=[]), filename, "exec")
+
+
+# Load the unmutated module and keep it as the base that load_incremental
+# builds later mutants of module_name on
+def load_baseline(tree, module_name="mutant"):
+    module = load_mutant(tree, module_name)
+    _baselines[module_name] = _Baseline(tree, module)
+    return module
+
+
+# Indexes of the statements a mutant changed, plus those that read a name
+# they bind (a subclass of a mutated class, a function calling it), closed
+# over what those bind in turn
+def _affected(tree, baseline, changed):
+    names = set().union(*(baseline.bound[index] | bound_names(tree.body[index]) for index in changed))
+    return _readers(baseline, set(changed), names)
+
+
+# rerun plus the indexes of the statements that read one of names, closed
+# over the names those statements bind in turn
+def _readers(baseline, rerun, names):
+    grown = True
+    while grown:
+        grown = False
+        for index, loaded in enumerate(baseline.loaded):
+            if index not in rerun and loaded & names:
+                rerun.add(index)
+                names |= baseline.bound[index]
+                grown = True
+    return rerun
+
+
+# Load a mutant by compiling only the top-level statements it changed and
+# reusing the baseline's code objects for the rest.
+# share=True executes only the affected statements in a copy of the
+# baseline namespace and reuses every other class and function as is, so
+# the cost follows the size of the change rather than of the module. That
+# is only safe where the baseline cannot outlive the mutant, i.e. in a child
+# forked for this one mutant, which is what the fork runner does.
+# Otherwise every statement is executed again in a fresh namespace, so the
+# classes, functions and module state a mutant's tests change are never
+# seen by the next mutant, just as with load_mutant; nothing unchanged is
+# compiled again, but executing the module still grows with its size.
+# Changed statements are found by identity: patch_tree shares the
+# statements it did not touch with the baseline tree. Without a matching
+# baseline the whole module is loaded
+def load_incremental(tree, module_name="mutant", share=False):
+    baseline = _baselines.get(module_name)
+    if baseline is None or not isinstance(tree, ast.Module) or len(tree.body) != len(baseline.tree.body):
+        return load_mutant(tree, module_name)
+
+    changed = {index for index, (statement, original) in enumerate(zip(tree.body, baseline.tree.body))
+               if statement is not original}
+    module = types.ModuleType(module_name)
+    if share:
+        module.__dict__.update(vars(baseline.module))
+        rerun = _affected(tree, baseline, changed)
+    else:
+        module.__file__ = baseline.module.__file__
+        rerun = range(len(tree.body))
+    for index in sorted(rerun):
+        if index in changed:
+            code = _compile_statement(tree.body[index], module.__file__)
+        else:
+            code = baseline.statement_code(index)
+        exec(code, module.__dict__)
+    sys.modules[module_name] = module
+    return module
+
+
+# Switch the baseline module of module_name, built by build_schema, over to
+# one of the mutants it holds; nothing is compiled. Unless share is set, the
+# schema's cached statements run again in a fresh module first, so the
+# mutants switched on in turn do not see each other's state; that costs as
+# much as load_incremental without share, so only forked children pay off
+def activate_mutant(mutation, module_name="mutant", switch="__mutant_active__", share=False):
+    baseline = _baselines[module_name]
+    module = baseline.module if share else load_incremental(baseline.tree, module_name)
+    setattr(module, switch, mutation)
+    sys.modules[module_name] = module
+    return module
+
+
+# {id(object): (object, replacement)} for a module replaced by another: the
+# module itself and each of its classes, functions and submodules, paired
+# with the same-named object of the replacement. Matching by identity covers
+# `import m as alias`, `from m import X as Y` and re-exported names alike
+def _replacements(old, new):
+    found = {id(old): (old, new)}
+    for name, value in vars(old).items():
+        if isinstance(value, (type, types.FunctionType, types.ModuleType)) and hasattr(new, name):
+            found[id(value)] = (value, getattr(new, name))
+    return found
+
+
+# The unmutated statements of each dependent module a package mutant rebuilt
+_dependent_baselines = {}
+
+
+# A dependent of replaced modules rebuilt on their replacements: a copy of
+# its namespace with every name bound to a replaced object rebound, in which
+# the top-level statements that read those names run again, so a subclass
+# of a mutated class is built on the mutant. None if it refers to nothing
+# replaced. The module on disk is left as it was
+def _rebuild(module, replacements):
+    rebound = {name: replacements[id(value)][1] for name, value in vars(module).items()
+               if id(value) in replacements and replacements[id(value)][0] is value}
+    if not rebound:
+        return None
+    baseline = _dependent_baselines.get(module.__name__)
+    if baseline is None or baseline.module is not module:
+        baseline = _dependent_baselines[module.__name__] = _Baseline(_package_tree(module, {}), module)
+    rebuilt = types.ModuleType(module.__name__)
+    vars(rebuilt).update(vars(module))
+    vars(rebuilt).update(rebound)
+    for index in sorted(_readers(baseline, set(), set(rebound))):
+        exec(baseline.statement_code(index), vars(rebuilt))
+    return rebuilt
+
+
+def _swap_module(module_name, old, new):
+    sys.modules[module_name] = new
+    parent, _, child = module_name.rpartition(".")
+    if parent in sys.modules and getattr(sys.modules[parent], child, None) is old:
+        setattr(sys.modules[parent], child, new)
+
+
+# The modules replaced for the current package mutant, [(name, original,
+# replacement)] in the order they were swapped in
+_package_mutant = []
+
+# {module file: parsed tree} of package modules a mutant was spliced into
+_package_trees = {}
+
+
+# A package mutant may arrive as only the top-level statements it changed,
+# {index: statement}; they replace those of the module's tree as on disk
+def _package_tree(module, tree):
+    if not isinstance(tree, dict):
+        return tree
+    path = module.__file__
+    if path not in _package_trees:
+        with open(path, "r") as f:
+            _package_trees[path] = ast.parse(f.read())
+    body = _package_trees[path].body
+    return ast.Module(body=[tree.get(index, statement) for index, statement in enumerate(body)], type_ignores=[])
+
+
+# Load a mutant of one module of a package: the module is replaced in
+# sys.modules, then each of its dependents from the import graph (the test
+# module included), given in import order, is rebuilt on what was replaced
+# before it (see _rebuild); no module is re-imported. The previous package
+# mutant is undone first. tree is the whole mutated module or just its
+# changed statements, {index: statement}
+def load_package_mutant(module_name, tree, dependents, is_package=False):
+    restore_package_mutant()
+    original = sys.modules.get(module_name) or importlib.import_module(module_name)
+    package = module_name if is_package else module_name.rpartition(".")[0]
+    mutant = load_mutant(_package_tree(original, tree), module_name, package)
+    sys.modules[module_name] = original
+    swaps = [(module_name, original, mutant)]
+    replacements = _replacements(original, mutant)
+    for dependent in dependents:
+        module = sys.modules.get(dependent)
+        rebuilt = _rebuild(module, replacements) if module is not None else None
+        if rebuilt is not None:
+            swaps.append((dependent, module, rebuilt))
+            replacements.update(_replacements(module, rebuilt))
+    for name, old, new in swaps:
+        _swap_module(name, old, new)
+    _package_mutant.extend(swaps)
+    return mutant
+
+
+def restore_package_mutant():
+    for name, original, replacement in reversed(_package_mutant):
+        _swap_module(name, replacement, original)
+    _package_mutant.clear()
+
+
+# Names that `from <module> import *` would bind
+def public_names(module):
+    names = getattr(module, "__all__", None)
+    if names is None:
+        names = [name for name in vars(module) if not name.startswith("_")]
+    return list(names)
+
+
+# Rebind the names a test module got from `from mutant import *` to the
+# given mutant module, dropping names the previous mutant provided
+def inject_mutant(test_module, mutant_module):
+    namespace = vars(test_module)
+    for name in namespace.get("__mutant_names__", ()):
+        namespace.pop(name, None)
+    names = public_names(mutant_module)
+    for name in names:
+        namespace[name] = getattr(mutant_module, name)
+    namespace["__mutant_names__"] = names
+    return test_module
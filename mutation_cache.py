@@ -0,0 +1,75 @@
+import ast
+import hashlib
+import importlib.util
+import os
+import sqlite3
+import time
+
+
+# Content hash of a mutated tree. Line numbers are left out of the dump, so
+# edits that only move code around do not invalidate cached results
+def tree_hash(tree):
+    return hashlib.sha256(ast.dump(tree, include_attributes=False).encode("utf-8")).hexdigest()
+
+
+# Content hash of a test module's source file
+def test_suite_hash(test_module="mutation_test"):
+    spec = importlib.util.find_spec(test_module)
+    with open(spec.origin, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+# Cache key for a mutant's result; mutant_hash is the tree_hash of its tree.
+# The site is identified by operator, label and paths rather than its id,
+# which holds a line number that any edit above the site changes
+def result_key(mutant_hash, site, suite_hash, tests):
+    parts = [mutant_hash, site.operator, site.label, repr(site.paths), suite_hash, ",".join(tests)]
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+# On-disk killed/survived results, keyed by result_key, so unchanged mutants
+# are not retested. Timeouts are not results of the mutant alone, and ones
+# stored by older versions are ignored. The least recently used entries
+# beyond max_entries are evicted on close
+class ResultCache:
+    def __init__(self, path=".mutation_cache/results.sqlite", max_entries=100000):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, operator TEXT, site TEXT, killed INTEGER, status TEXT, "
+            "test TEXT, error TEXT, duration REAL, last_used REAL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+
+    def get(self, key):
+        row = self.connection.execute(
+            "SELECT killed, status, test, error, duration FROM results WHERE key = ? AND status != 'timeout'", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self.connection.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        killed, status, test, error, duration = row
+        return {"killed": bool(killed), "status": status, "test": test, "error": error, "duration": duration}
+
+    def put(self, key, site, result):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, site.operator, site.id, int(result["killed"]), result["status"], result["test"], result["error"],
+             result.get("duration"), time.time()),
+        )
+
+    def evict(self):
+        self.connection.execute(
+            "DELETE FROM results WHERE key IN "
+            "(SELECT key FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def close(self):
+        self.evict()
+        self.connection.commit()
+        self.connection.close()
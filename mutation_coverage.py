@@ -0,0 +1,92 @@
+import ast
+import importlib
+import sys
+import unittest
+
+from mutant_loader import inject_mutant, load_mutant
+from mutation_operators import node_at
+
+
+# All test ids ("Class.test_method") of the TestCase classes in a test module
+def list_tests(test_module):
+    tests = []
+    for name, value in vars(test_module).items():
+        if isinstance(value, type) and issubclass(value, unittest.TestCase):
+            tests.extend(f"{name}.{method}" for method in unittest.TestLoader().getTestCaseNames(value))
+    return tests
+
+
+# Find the TestCase class and method name for a test id; a bare method name
+# (as used in mutation_test_map) resolves to the first class defining it
+def resolve_test(test_module, test_name):
+    if "." in test_name:
+        class_name, method_name = test_name.split(".", 1)
+        return getattr(test_module, class_name), method_name
+    for value in vars(test_module).values():
+        if isinstance(value, type) and issubclass(value, unittest.TestCase) and hasattr(value, test_name):
+            return value, test_name
+    raise AttributeError(f"no test named {test_name!r} in {test_module.__name__}")
+
+
+# Run every test against the unmutated module and record which of its
+# lines each test executes: {test id: frozenset(line numbers)}. Tests that
+# already fail on the original code cannot tell mutants apart and are left out
+def collect_coverage(source_code, test_module="mutation_test", module_name="mutant"):
+    original = load_mutant(ast.parse(source_code), module_name)
+    if test_module in sys.modules:
+        module = sys.modules[test_module]
+    else:
+        module = importlib.import_module(test_module)
+    inject_mutant(module, original)
+
+    coverage = {}
+    for test_name in list_tests(module):
+        lines = set()
+
+        def trace(frame, event, arg):
+            if frame.f_code.co_filename != original.__file__:
+                return None
+            if event == "line":
+                lines.add(frame.f_lineno)
+            return trace
+
+        test_class, method_name = resolve_test(module, test_name)
+        test_case = test_class(method_name)
+        sys.settrace(trace)
+        try:
+            test_case.setUp()
+            getattr(test_case, method_name)()
+        except Exception as e:
+            print(f"Test '{test_name}' fails on the original code, skipping it. Error: {e}")
+            continue
+        finally:
+            sys.settrace(None)
+        coverage[test_name] = frozenset(lines)
+    return coverage
+
+
+# Lines of the original source that a site's mutation touches
+def site_lines(tree, site):
+    lines = set()
+    for path in site.paths:
+        node = node_at(tree, path)
+        lines.update(range(node.lineno, (node.end_lineno or node.lineno) + 1))
+    return lines
+
+
+# Whether a site changes a class as a whole (its bases, its constructor, or a
+# member added to it). The class statement only runs at import time, and the
+# change can show through any use of the class or its subclasses, including
+# ones that execute none of its lines, such as isinstance checks or
+# inherited methods
+def class_level(tree, site):
+    return any(isinstance(node_at(tree, path), ast.ClassDef) for path in site.paths)
+
+
+# The tests whose coverage reaches the mutated site; a class-level site gets
+# every test that passes on the original code
+def tests_for_site(coverage, tree, site):
+    if class_level(tree, site):
+        return list(coverage)
+    lines = site_lines(tree, site)
+    return [test_name for test_name, covered in coverage.items() if covered & lines]
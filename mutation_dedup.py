@@ -0,0 +1,20 @@
+from mutation_cache import tree_hash
+
+
+# Spots mutants that are identical to the original code or to a mutant seen
+# earlier in the campaign, by hashing their normalized ASTs (positions are
+# left out, so formatting and line shifts do not matter)
+class MutantDeduplicator:
+    def __init__(self, original_tree):
+        self.original = tree_hash(original_tree)
+        self.seen = {}
+
+    # "unchanged", ("duplicate", first mutant id), or None for a new mutant;
+    # digest is the tree_hash of the mutant's tree
+    def check(self, mutant_id, digest):
+        if digest == self.original:
+            return "unchanged"
+        if digest in self.seen:
+            return "duplicate", self.seen[digest]
+        self.seen[digest] = mutant_id
+        return None
@@ -0,0 +1,347 @@
+import ast
+import importlib
+import multiprocessing
+import os
+import signal
+import sys
+import time
+import tracemalloc
+from multiprocessing.connection import wait
+
+from mutant_loader import activate_mutant, inject_mutant, load_baseline, load_incremental, load_package_mutant
+from mutation_coverage import resolve_test
+
+
+# Import the test module once per process; later mutants are injected into it
+def _test_module(test_module):
+    if test_module in sys.modules:
+        return sys.modules[test_module]
+    return importlib.import_module(test_module)
+
+
+def _error(e):
+    return f"{type(e).__name__}: {e}"
+
+
+def _phase(result, name, wall, cpu):
+    result["phases"][name] = {"wall": time.perf_counter() - wall, "cpu": time.process_time() - cpu}
+
+
+# Run a mutant against its tests, stopping at the first test that kills it
+# unless fail_fast is off, in which case every test runs and all the killers
+# are listed in "killing_tests". on_test_start is called with each test name
+# before the test runs. A mutated_tree of None activates the mutant in the
+# loaded mutant schema, and a (module name, tree, dependents, is_package)
+# tuple loads a mutant of one module of a package. share_baseline lets the
+# mutant reuse the baseline's untouched classes, for a process that runs only
+# this one mutant. track_memory records in "peak_kb" the most memory the
+# mutant's loading and tests allocated on top of what the process held
+def run_mutant_test(mutation, test_names, mutated_tree, test_module="mutation_test", on_test_start=None,
+                    module_name="mutant", fail_fast=True, share_baseline=False, track_memory=False):
+    if track_memory:
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        held = tracemalloc.get_traced_memory()[0]
+    try:
+        result = _run_mutant_test(mutation, test_names, mutated_tree, test_module, on_test_start, module_name,
+                                  fail_fast, share_baseline)
+    finally:
+        if track_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            if started_tracing:
+                tracemalloc.stop()
+    if track_memory:
+        result["peak_kb"] = max(0, peak - held) // 1024
+    return result
+
+
+def _run_mutant_test(mutation, test_names, mutated_tree, test_module, on_test_start, module_name, fail_fast,
+                     share_baseline):
+    start, cpu = time.perf_counter(), time.process_time()
+    result = {"mutation": mutation, "tests": [], "test": None, "killed": False, "status": "survived", "error": None,
+              "phases": {}, "test_durations": {}, "killing_tests": []}
+    try:
+        if mutated_tree is None:
+            mutant = activate_mutant(mutation, module_name, share=share_baseline)
+            module = inject_mutant(_test_module(test_module), mutant)
+        elif isinstance(mutated_tree, tuple):
+            # The test module imports the package itself and is rebuilt as
+            # one of the dependents, so it must be imported before the mutant
+            _test_module(test_module)
+            load_package_mutant(*mutated_tree)
+            module = _test_module(test_module)
+        else:
+            mutant = load_incremental(mutated_tree, module_name, share_baseline)
+            module = inject_mutant(_test_module(test_module), mutant)
+    except (Exception, SystemExit) as e:
+        # A mutant that cannot even be loaded is killed by every test
+        result.update(killed=True, status="killed", error=_error(e), killing_tests=list(test_names))
+        _phase(result, "load", start, cpu)
+        result["duration"] = time.perf_counter() - start
+        return result
+    _phase(result, "load", start, cpu)
+
+    tests_wall, tests_cpu = time.perf_counter(), time.process_time()
+    for test_name in test_names:
+        if on_test_start is not None:
+            on_test_start(test_name)
+        result["tests"].append(test_name)
+        test_start = time.perf_counter()
+        try:
+            test_class, method_name = resolve_test(module, test_name)
+            test_case = test_class(method_name)
+            test_case.setUp()
+            getattr(test_case, method_name)()
+        except (Exception, SystemExit) as e:
+            result["killing_tests"].append(test_name)
+            if not result["killed"]:
+                result.update(killed=True, status="killed", test=test_name, error=_error(e))
+            if fail_fast:
+                break  # The remaining tests cannot change the outcome
+        finally:
+            result["test_durations"][test_name] = time.perf_counter() - test_start
+    _phase(result, "tests", tests_wall, tests_cpu)
+    result["duration"] = time.perf_counter() - start
+    return result
+
+
+# Only the top-level statements a mutant changed are pickled to a pool
+# worker, as {index: statement}; the worker splices them into its own copy of
+# the baseline tree, whose statements load_incremental has already compiled
+def _pack(tree, baseline_tree):
+    if baseline_tree is None or not isinstance(tree, ast.Module) or len(tree.body) != len(baseline_tree.body):
+        return tree
+    return {index: statement for index, (statement, original) in enumerate(zip(tree.body, baseline_tree.body))
+            if statement is not original}
+
+
+def _unpack(tree, baseline_tree):
+    if not isinstance(tree, dict):
+        return tree
+    return ast.Module(body=[tree.get(index, statement) for index, statement in enumerate(baseline_tree.body)],
+                      type_ignores=[])
+
+
+# Worker process loop: run jobs from the pipe until told to stop, reporting
+# when each test starts so the parent can enforce per-test timeouts
+def _worker_loop(connection, test_module, baseline_tree, module_name, fail_fast, track_memory):
+    if baseline_tree is not None:
+        load_baseline(baseline_tree, module_name)
+    _test_module(test_module)
+    while True:
+        job = connection.recv()
+        if job is None:
+            break
+        mutation, test_names, mutated_tree = job
+        job = mutation, test_names, _unpack(mutated_tree, baseline_tree)
+        on_test_start = lambda test_name: connection.send(("start", test_name))
+        result = run_mutant_test(*job, test_module=test_module, on_test_start=on_test_start, module_name=module_name,
+                                 fail_fast=fail_fast, track_memory=track_memory)
+        connection.send(("done", result))
+
+
+# A reusable worker process fed jobs over a pipe
+class _Worker:
+    def __init__(self, test_module, baseline_tree, module_name, fail_fast=True, track_memory=False):
+        self.baseline_tree = baseline_tree
+        self.connection, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_worker_loop, args=(child, test_module, baseline_tree, module_name, fail_fast, track_memory),
+            daemon=True)
+        self.process.start()
+        child.close()
+
+    def submit(self, job):
+        mutation, test_names, mutated_tree = job
+        self.connection.send((mutation, test_names, _pack(mutated_tree, self.baseline_tree)))
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.kill()
+
+
+# A child forked from the warm parent for a single job. It inherits the
+# imported test module and the job itself, so nothing is re-imported or pickled
+class _ForkedChild:
+    def __init__(self, test_module, module_name, fail_fast=True, track_memory=False):
+        self.test_module = test_module
+        self.module_name = module_name
+        self.fail_fast = fail_fast
+        self.track_memory = track_memory
+        self.connection = None
+        self.pid = None
+
+    def submit(self, job):
+        self.connection, child = multiprocessing.Pipe()
+        self.pid = os.fork()
+        if self.pid == 0:
+            status = 0
+            try:
+                self.connection.close()
+                on_test_start = lambda test_name: child.send(("start", test_name))
+                # The child dies with the mutant, so the baseline it shares cannot carry state on
+                result = run_mutant_test(*job, test_module=self.test_module, on_test_start=on_test_start,
+                                         module_name=self.module_name, fail_fast=self.fail_fast,
+                                         share_baseline=True, track_memory=self.track_memory)
+                child.send(("done", result))
+            except BaseException:
+                status = 1
+            finally:
+                os._exit(status)
+        child.close()
+
+    def kill(self):
+        try:
+            os.kill(self.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.stop()
+
+    def stop(self):
+        os.waitpid(self.pid, 0)
+        self.connection.close()
+
+
+# Drive jobs through runners from acquire() until every job has a result,
+# yielding results in the order they finish. Jobs are pulled from the
+# iterable only when a runner is free, so mutants can be generated lazily.
+# release(runner, healthy) hands a runner back; unhealthy runners were
+# killed and must not be reused
+def _run_jobs(jobs, workers, timeout, acquire, release):
+    jobs = iter(jobs)
+    pending = next(jobs, None)
+    busy = {}
+
+    def killed(runner, state, status, error, crashed=False):
+        job, test, tests, started, _ = state
+        busy.pop(runner.connection)
+        runner.kill()
+        release(runner, False)
+        return {"mutation": job[0], "tests": tests, "test": test, "killed": True, "killing_tests": [test],
+                "status": status, "error": error, "duration": time.perf_counter() - started, "crashed": crashed}
+
+    while pending is not None or busy:
+        while pending is not None and len(busy) < workers:
+            runner = acquire()
+            job, pending = pending, next(jobs, None)
+            started = time.perf_counter()
+            runner.submit(job)
+            busy[runner.connection] = (runner, [job, None, [], started, started + timeout if timeout else None])
+
+        now = time.perf_counter()
+        deadlines = [state[4] for _, state in busy.values() if state[4] is not None]
+        wait_for = max(0, min(deadlines) - now) if deadlines else None
+        for connection in wait(list(busy), wait_for):
+            runner, state = busy[connection]
+            try:
+                kind, payload = connection.recv()
+            except (EOFError, OSError):
+                yield killed(runner, state, "killed", "Worker process crashed", crashed=True)
+                continue
+            if kind == "start":
+                state[1] = payload
+                state[2].append(payload)
+                if timeout:
+                    state[4] = time.perf_counter() + timeout
+            else:
+                del busy[connection]
+                release(runner, True)
+                yield payload
+
+        now = time.perf_counter()
+        for runner, state in list(busy.values()):
+            if state[4] is not None and now >= state[4]:
+                yield killed(runner, state, "timeout", f"Timed out after {timeout}s")
+
+
+# Send every (mutation, test_names, mutated_tree) job to a pool of worker
+# processes and yield the results in the order they finish. A test running
+# longer than timeout seconds gets its worker killed and replaced, and the
+# mutant counts as killed by timeout
+def run_mutants_in_pool(jobs, workers=None, timeout=None, test_module="mutation_test", baseline_tree=None,
+                        module_name="mutant", fail_fast=True, track_memory=False):
+    workers = workers or os.cpu_count() or 1
+    pool = []
+    idle = []
+
+    # Workers are started on demand, up to `workers` of them
+    def acquire():
+        if idle:
+            return idle.pop()
+        worker = _Worker(test_module, baseline_tree, module_name, fail_fast, track_memory)
+        pool.append(worker)
+        return worker
+
+    def release(worker, healthy):
+        if healthy:
+            idle.append(worker)
+        else:
+            pool.remove(worker)
+
+    try:
+        yield from _run_jobs(jobs, workers, timeout, acquire, release)
+    finally:
+        for worker in pool:
+            worker.stop()
+
+
+# Fork-server mode: this process imports the test module and its
+# dependencies once, against the unmutated baseline, then forks a child per
+# mutant that swaps in the mutated module and runs its tests
+def run_mutants_forked(jobs, workers=None, timeout=None, test_module="mutation_test", baseline_tree=None,
+                       module_name="mutant", fail_fast=True, track_memory=False):
+    if baseline_tree is not None:
+        load_baseline(baseline_tree, module_name)
+    _test_module(test_module)
+    workers = workers or os.cpu_count() or 1
+
+    def release(child, healthy):
+        if healthy:
+            child.stop()
+
+    yield from _run_jobs(jobs, workers, timeout, lambda: _ForkedChild(test_module, module_name, fail_fast, track_memory),
+                         release)
+
+
+# Run every job serially in this process; no isolation and no timeouts
+def run_mutants_in_process(jobs, workers=None, timeout=None, test_module="mutation_test", baseline_tree=None,
+                           module_name="mutant", fail_fast=True, track_memory=False):
+    if baseline_tree is not None:
+        load_baseline(baseline_tree, module_name)
+    for job in jobs:
+        yield run_mutant_test(*job, test_module=test_module, module_name=module_name, fail_fast=fail_fast,
+                              track_memory=track_memory)
+
+
+# Execution modes selectable by name
+mutant_runners = {
+    "pool": run_mutants_in_pool,
+    "fork": run_mutants_forked,
+    "inprocess": run_mutants_in_process,
+}
+
+# Only a forked child can load a mutant incrementally on the baseline it
+# shares (see load_incremental); the pool and inprocess runners execute the
+# whole module again for every mutant, so fork is the default where it exists
+DEFAULT_RUNNER = "fork" if hasattr(os, "fork") else "pool"
+
+
+# Run jobs with the named runner. baseline_tree is the unmutated module the
+# test module is first imported against. track_memory adds each mutant's own
+# peak allocation to its result (see run_mutant_test)
+def run_mutants(jobs, runner=DEFAULT_RUNNER, workers=None, timeout=None, test_module="mutation_test",
+                baseline_tree=None, module_name="mutant", fail_fast=True, track_memory=False):
+    return mutant_runners[runner](jobs, workers, timeout, test_module, baseline_tree, module_name, fail_fast,
+                                  track_memory)
@@ -0,0 +1,257 @@
+import asyncio
+import collections
+import json
+import os
+import sys
+import threading
+import time
+
+
+# Events that only report progress; they are shed first when sinks fall behind
+PROGRESS_EVENTS = ("generated", "started")
+
+
+# Campaign events ({"event": kind, "time": ..., **fields}) fanned out to
+# sinks by an asyncio loop on a background thread. publish() only appends to
+# a buffer, so the campaign never waits on a sink; the loop hands the sinks a
+# batch every `interval` seconds or `batch_size` events. When more than
+# max_pending events are waiting, progress events are dropped and outcome
+# events make publish() wait for the sinks: the back-pressure only reaches
+# the campaign when the sinks are hopelessly behind. A sink that fails to
+# start makes the constructor raise its error; one that fails later stops the
+# loop, and publish() and close() raise the error from then on
+class EventBus:
+    def __init__(self, sinks, batch_size=256, interval=0.1, max_pending=10000):
+        self.sinks = sinks
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._pending = collections.deque()
+        self._drained = threading.Event()
+        self._drained.set()
+        self._closing = False
+        self._error = None
+        self._raised = False
+        self._loop = asyncio.new_event_loop()
+        self._wakeup = None
+        self._thread = threading.Thread(target=self._run, name="mutation-events", daemon=True)
+        self._started = threading.Event()
+        self._thread.start()
+        self._started.wait()
+        if self._error is not None:
+            self._thread.join()
+            self._raised = True
+            raise self._error
+
+    def publish(self, kind, **fields):
+        if len(self._pending) >= self.max_pending and kind in PROGRESS_EVENTS:
+            self.dropped += 1
+            return
+        while len(self._pending) >= self.max_pending:
+            self._drained.clear()
+            self._wake()
+            self._drained.wait(self.interval)
+        self._pending.append({"event": kind, "time": time.time(), **fields})
+        if len(self._pending) >= self.batch_size:
+            self._wake()
+
+    def close(self):
+        self._closing = True
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            pass  # The loop already stopped
+        self._thread.join()
+        # An error publish() already raised is not raised again
+        if self._error is not None and not self._raised:
+            self._raised = True
+            raise self._error
+
+    # Raise the error that stopped the loop thread, if it has stopped
+    def _check(self):
+        if self._thread.is_alive():
+            return
+        self._thread.join()
+        self._raised = True
+        if self._error is not None:
+            raise self._error
+        raise RuntimeError("the event bus loop has stopped")
+
+    def _wake(self):
+        self._check()
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            # The loop closed after the check above
+            self._check()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._pump())
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._loop.close()
+            # Nobody may be left waiting on a loop that is gone
+            self._started.set()
+            self._drained.set()
+
+    async def _pump(self):
+        self._wakeup = asyncio.Event()
+        started = []
+        try:
+            for sink in self.sinks:
+                await sink.start()
+                started.append(sink)
+        except BaseException:
+            await self._close_sinks(started)
+            raise
+        self._started.set()
+        try:
+            await self._deliver()
+        except BaseException:
+            await self._close_sinks(self.sinks)
+            raise
+        for sink in self.sinks:
+            await sink.close(self.dropped)
+
+    # Best-effort close after a sink failed; the first error is the one raised
+    async def _close_sinks(self, sinks):
+        for sink in sinks:
+            try:
+                await sink.close(self.dropped)
+            except Exception:
+                pass
+
+    async def _deliver(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            closing = self._closing
+            while self._pending:
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                for sink in self.sinks:
+                    await sink.write(batch)
+                if len(self._pending) < self.max_pending:
+                    self._drained.set()
+            self._drained.set()
+            for sink in self.sinks:
+                await sink.tick()
+            if closing:
+                break
+
+
+# Sinks receive batches of events on the bus loop; tick() runs after every
+# round, with or without events, so a dashboard can refresh its rates
+class EventSink:
+    async def start(self):
+        pass
+
+    async def write(self, events):
+        pass
+
+    async def tick(self):
+        pass
+
+    async def close(self, dropped):
+        pass
+
+
+# One JSON object per line, flushed after every batch
+class JsonLinesSink(EventSink):
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    async def start(self):
+        self.file = open(self.path, "w")
+
+    async def write(self, events):
+        self.file.write("".join(json.dumps(event) + "\n" for event in events))
+        self.file.flush()
+
+    async def close(self, dropped):
+        self.file.close()
+
+
+# Serve the events as JSON lines on a Unix socket; any number of watchers can
+# connect, e.g. `nc -U <path>`, and get the events from then on. A watcher
+# that cannot keep up for `timeout` seconds is disconnected
+class SocketSink(EventSink):
+    def __init__(self, path, timeout=1.0):
+        self.path = path
+        self.timeout = timeout
+        self.clients = set()
+        self.server = None
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.server = await asyncio.start_unix_server(self._connected, self.path)
+
+    async def _connected(self, reader, writer):
+        self.clients.add(writer)
+
+    async def write(self, events):
+        data = "".join(json.dumps(event) + "\n" for event in events).encode("utf-8")
+        for writer in list(self.clients):
+            try:
+                writer.write(data)
+                await asyncio.wait_for(writer.drain(), self.timeout)
+            except (OSError, asyncio.TimeoutError):
+                self.clients.discard(writer)
+                writer.close()
+
+    async def close(self, dropped):
+        for writer in self.clients:
+            writer.close()
+        self.server.close()
+        await self.server.wait_closed()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+# Live one-line status: progress against the campaign total, outcome counts,
+# the running score and the throughput over the last few seconds
+class DashboardSink(EventSink):
+    def __init__(self, stream=None, window=5.0):
+        self.stream = stream or sys.stderr
+        self.window = window
+        self.total = None
+        self.counts = collections.Counter()
+        self.finished = collections.deque()
+        self.started = time.time()
+
+    async def write(self, events):
+        for event in events:
+            if event["event"] == "campaign_started":
+                self.total = event.get("total")
+                self.started = event["time"]
+            elif event["event"] != "campaign_finished":
+                self.counts[event["event"]] += 1
+                if event["event"] not in PROGRESS_EVENTS:
+                    self.finished.append(event["time"])
+
+    async def tick(self):
+        now = time.time()
+        while self.finished and self.finished[0] < now - self.window:
+            self.finished.popleft()
+        done = sum(count for event, count in self.counts.items() if event not in PROGRESS_EVENTS)
+        killed = self.counts["killed"] + self.counts["timeout"]
+        scored = killed + self.counts["survived"]
+        score = f"{killed / scored * 100:.1f}%" if scored else "-"
+        self.stream.write(
+            f"\rmutants {done}/{self.total if self.total is not None else '?'} | killed {self.counts['killed']} "
+            f"timeout {self.counts['timeout']} survived {self.counts['survived']} skipped {self.counts['skipped']} "
+            f"| score {score} | {len(self.finished) / self.window:.1f} mutants/s | {now - self.started:.0f}s ")
+        self.stream.flush()
+
+    async def close(self, dropped):
+        await self.tick()
+        self.stream.write("\n")
+        self.stream.flush()
@@ -0,0 +1,97 @@
+import json
+
+
+# Which tests kill which mutants. Each mutant's row is a Python int used as a
+# bitset, bit j set when test j kills it, so a 100k x 5k matrix takes about
+# the 60 MB its bits need instead of a list of lists
+class KillMatrix:
+    def __init__(self, tests):
+        self.tests = list(tests)
+        self.columns = {test: column for column, test in enumerate(self.tests)}
+        self.mutants = []
+        self.rows = []
+
+    def add(self, mutation, killing_tests):
+        row = 0
+        for test in killing_tests:
+            row |= 1 << self.columns[test]
+        self.mutants.append(mutation)
+        self.rows.append(row)
+
+    def killers(self, mutation):
+        row = self.rows[self.mutants.index(mutation)]
+        return [test for column, test in enumerate(self.tests) if row >> column & 1]
+
+    # Minimal mutant set: mutant A subsumes B when every test killing A also
+    # kills B, so B adds no adequacy signal once A is in the set. Rows are
+    # visited by increasing number of killers and checked only against the
+    # dominators found so far, which is enough since subsumption is
+    # transitive. Returns (dominators, {subsumed mutant: its dominator},
+    # unkilled mutants); identical rows keep their first mutant. The check is
+    # vectorised with numpy when it is installed, unless vectorized is off;
+    # both paths give the same answer
+    def subsumption(self, vectorized=True):
+        try:
+            import numpy
+        except ImportError:  # The analysis falls back to plain int bitsets
+            numpy = None
+        if not vectorized:
+            numpy = None
+        unkilled = [mutation for mutation, row in zip(self.mutants, self.rows) if not row]
+        first = {}
+        for mutation, row in zip(self.mutants, self.rows):
+            if row:
+                first.setdefault(row, mutation)
+        candidates = sorted(first, key=lambda row: (bin(row).count("1"), first[row]))
+
+        dominator_rows = []
+        by_row = {}
+        if numpy is not None and candidates:
+            width = (len(self.tests) + 7) // 8
+            packed = numpy.zeros((len(candidates), width), dtype=numpy.uint8)
+            kept = 0
+            for row in candidates:
+                bits = numpy.frombuffer(row.to_bytes(width, "little"), dtype=numpy.uint8)
+                inside = ~numpy.any(packed[:kept] & ~bits, axis=1)
+                if inside.any():
+                    by_row[row] = dominator_rows[int(inside.argmax())]
+                    continue
+                packed[kept] = bits
+                kept += 1
+                dominator_rows.append(row)
+        else:
+            for row in candidates:
+                dominator = next((dominator for dominator in dominator_rows if dominator & row == dominator), None)
+                if dominator is None:
+                    dominator_rows.append(row)
+                else:
+                    by_row[row] = dominator
+
+        dominators = [first[row] for row in dominator_rows]
+        subsumed = {}
+        for mutation, row in zip(self.mutants, self.rows):
+            if row and mutation != first[row]:
+                subsumed[mutation] = first[row]  # Same killers as an earlier mutant
+            elif row in by_row:
+                subsumed[mutation] = first[by_row[row]]
+        return dominators, subsumed, unkilled
+
+    def write(self, stream):
+        dominators, subsumed, unkilled = self.subsumption()
+        json.dump({
+            "tests": self.tests,
+            "mutants": self.mutants,
+            "rows": [format(row, "x") for row in self.rows],
+            "dominators": dominators,
+            "subsumed": subsumed,
+            "unkilled": unkilled,
+        }, stream, indent=2)
+        stream.write("\n")
+
+    @classmethod
+    def read(cls, stream):
+        data = json.load(stream)
+        matrix = cls(data["tests"])
+        matrix.mutants = data["mutants"]
+        matrix.rows = [int(row, 16) for row in data["rows"]]
+        return matrix
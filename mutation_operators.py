@@ -0,0 +1,465 @@
+import ast
+import copy
+from collections import namedtuple
+
+
+# A place in the tree where an operator applies. `paths` holds one
+# (field, index) path from the module root per node the mutation touches,
+# and `arg` carries whatever the mutation needs to know about the site
+class MutationSite(namedtuple("MutationSite", ["operator", "paths", "label", "lineno", "arg"])):
+    __slots__ = ()
+
+    @property
+    def id(self):
+        return f"{self.operator}:{self.label}@{self.lineno}"
+
+
+def _is_dunder(name):
+    return name.startswith("__") and name.endswith("__")
+
+
+def _param_names(function):
+    return [arg.arg for arg in function.args.args]
+
+
+def _self_attribute(name, ctx):
+    return ast.Attribute(value=ast.Name(id="self", ctx=ast.Load()), attr=name, ctx=ctx)
+
+
+# ---- Operator mutations: each gets a private copy of the target node plus
+# ---- the site's arg, and returns the replacement node or None to delete it
+
+def _delete_node(node, arg):
+    return None
+
+
+def _add_parameter(node, name):
+    # Append a required parameter; it has to be keyword-only when the
+    # existing positional parameters end in defaults
+    if node.args.defaults or node.args.vararg:
+        node.args.kwonlyargs.append(ast.arg(arg=name, annotation=None))
+        node.args.kw_defaults.append(None)
+    else:
+        node.args.args.append(ast.arg(arg=name, annotation=None))
+    return node
+
+
+# Incorrect overriding: the override grows an optional "loud" flag and its
+# body is rewritten, so it still accepts every call the original did but no
+# longer does what it overrode the parent for
+def _change_signature_iod(node, arg):
+    flag = ast.arg(arg="loud", annotation=None)
+    if node.args.vararg:
+        node.args.kwonlyargs.append(flag)
+        node.args.kw_defaults.append(ast.Constant(value=False))
+    else:
+        node.args.args.append(flag)
+        node.args.defaults.append(ast.Constant(value=False))
+    node.body = [
+        ast.Return(
+            value=ast.IfExp(
+                test=ast.Name(id="loud", ctx=ast.Load()),
+                body=ast.Constant(value=f"Loud {node.name}!"),
+                orelse=ast.Constant(value=f"{node.name}!"),
+            )
+        )
+    ]
+    return node
+
+
+def _change_argument(node, arg):
+    return _add_parameter(node, "detailed")
+
+
+def _insert_super_invocation(node, arg):
+    super_call = ast.Expr(
+        value=ast.Call(
+            func=ast.Attribute(
+                value=ast.Call(func=ast.Name(id="super", ctx=ast.Load()), args=[], keywords=[]),
+                attr=node.name,
+                ctx=ast.Load(),
+            ),
+            args=[ast.Name(id=name, ctx=ast.Load()) for name in _param_names(node)[1:]],
+            keywords=[],
+        )
+    )
+    node.body.insert(0, super_call)
+    return node
+
+
+def _delete_parameter(node, arg):
+    node.args.args.pop(-1)  # Remove the last parameter
+    # Drop its default too, so the defaults stay aligned with the parameters
+    if node.args.defaults:
+        node.args.defaults.pop(-1)
+    return node
+
+
+def _hide_method(node, arg):
+    method_name, params, class_name = arg
+    new_method = ast.FunctionDef(
+        name=method_name,
+        args=ast.arguments(
+            posonlyargs=[],
+            args=[ast.arg(arg=name, annotation=None) for name in params],
+            vararg=None,
+            kwarg=None,
+            kwonlyargs=[],
+            kw_defaults=[],
+            defaults=[],
+        ),
+        body=[ast.Return(value=ast.Constant(value=f"Hidden method in {class_name}"))],
+        decorator_list=[],
+    )
+    node.body.append(new_method)
+    return node
+
+
+def _hide_field(node, arg):
+    field_name, class_name = arg
+    new_field = ast.Assign(
+        targets=[_self_attribute(field_name, ast.Store())],
+        value=ast.Constant(value=f"Hidden field in {class_name}"),
+    )
+    node.body.append(new_field)
+    return node
+
+
+def _change_parent_class(node, arg):
+    node.bases = [ast.Name(id="object", ctx=ast.Load())]
+    return node
+
+
+def _delete_constructor(node, arg):
+    node.body = [n for n in node.body if not isinstance(n, ast.FunctionDef) or n.name != "__init__"] or [ast.Pass()]
+    return node
+
+
+def _inline_constructor(node, arg):
+    constructor = _constructor(node)
+    if constructor is None:
+        return node
+    params = _param_names(constructor)
+    new_method = ast.FunctionDef(
+        name="set_info",
+        args=ast.arguments(
+            posonlyargs=[], args=[ast.arg(arg=name, annotation=None) for name in params],
+            vararg=None, kwarg=None, kwonlyargs=[], kw_defaults=[], defaults=[]
+        ),
+        body=[
+            ast.Assign(targets=[_self_attribute(name, ast.Store())], value=ast.Name(id=name, ctx=ast.Load()))
+            for name in params[1:]
+        ] or [ast.Pass()],
+        decorator_list=[],
+    )
+    node.body.append(new_method)
+    return node
+
+
+def _make_public(node, arg):
+    node.attr = arg
+    return node
+
+
+def _constructor(class_node):
+    for item in class_node.body:
+        if isinstance(item, ast.FunctionDef) and item.name == "__init__":
+            return item
+    return None
+
+
+# ---- Site finders: each yields (group key, label, arg) for every site the
+# ---- operator has at this node. Sites sharing a group key are merged into
+# ---- one mutant that touches all of their nodes
+
+def _find_private_access(node, walker):  # AMC
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+        if node.attr in walker.private_fields:
+            yield node.attr, node.attr, node.attr.lstrip("_")
+
+
+def _find_hidable_methods(node, walker):  # IHI
+    if isinstance(node, ast.ClassDef):
+        for method_name, params in walker.inherited_methods(node.name):
+            if not _is_dunder(method_name):
+                yield None, f"{node.name}.{method_name}", (method_name, tuple(params), node.name)
+
+
+def _find_hidable_fields(node, walker):  # IHD
+    cls = walker.method_class(node)
+    if cls is not None and node.name == "__init__":
+        for field in walker.inherited_fields(cls.name):
+            yield None, f"{cls.name}.{field}", (field, cls.name)
+
+
+def _find_overriding_methods(node, walker):  # IOD, ISI, OMD
+    cls = walker.method_class(node)
+    if cls is not None and not _is_dunder(node.name) and walker.overridden(cls.name, node.name):
+        yield None, f"{cls.name}.{node.name}", None
+
+
+def _find_methods(node, walker):  # OAC
+    cls = walker.method_class(node)
+    if cls is not None and not _is_dunder(node.name):
+        yield None, f"{cls.name}.{node.name}", None
+
+
+def _find_polymorphic_methods(node, walker):  # PMD
+    cls = walker.method_class(node)
+    if cls is not None and not _is_dunder(node.name):
+        root = walker.hierarchy_root(cls.name)
+        if walker.polymorphic[(root, node.name)] > 1:
+            # A root from another module (a qualified name in a class view)
+            # keeps its definition; the label names the class deleted from
+            label = f"{cls.name}.{node.name}" if "." in root else f"{root}.{node.name}"
+            yield (root, node.name), label, None
+
+
+def _find_parameters(node, walker):  # PPD
+    cls = walker.method_class(node)
+    # Ensure at least one parameter besides self exists
+    if cls is not None and len(node.args.args) > 1:
+        yield None, f"{cls.name}.{node.name}", None
+
+
+def _find_constructors(node, walker):  # PCI, PCD
+    if isinstance(node, ast.ClassDef) and _constructor(node) is not None:
+        yield None, node.name, None
+
+
+def _find_subclasses(node, walker):  # IPC
+    if isinstance(node, ast.ClassDef) and any(
+            not (isinstance(base, ast.Name) and base.id == "object") for base in node.bases):
+        yield None, node.name, None
+
+
+# Operator -> (where it applies, how to mutate it)
+mutation_operators = {
+    "AMC": (_find_private_access, _make_public),  # Access Modifier Change
+    "IHI": (_find_hidable_methods, _hide_method),  # Hiding a Method in Subclass
+    "IHD": (_find_hidable_fields, _hide_field),  # Hiding a Field in Subclass
+    "IOD": (_find_overriding_methods, _change_signature_iod),  # Incorrect Method Overriding
+    "ISI": (_find_overriding_methods, _insert_super_invocation),  # Insert Super Invocation
+    "IPC": (_find_subclasses, _change_parent_class),  # Change Parent Class
+    "PMD": (_find_polymorphic_methods, _delete_node),  # Polymorphic Method Deletion
+    "PPD": (_find_parameters, _delete_parameter),  # Parameter Deletion
+    "PCI": (_find_constructors, _inline_constructor),  # Constructor Inlining
+    "PCD": (_find_constructors, _delete_constructor),  # Constructor Deletion
+    "OMD": (_find_overriding_methods, _delete_node),  # Overriding Method Deletion
+    "OAC": (_find_methods, _change_argument),  # Argument Change
+}
+
+
+# Dotted name of a base class expression, e.g. "animals.Animal", or None
+def dotted_name(node):
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        prefix = dotted_name(node.value)
+        return f"{prefix}.{node.attr}" if prefix else None
+    return None
+
+
+# {class name: (base names, {method name: parameter names}, fields set in
+# __init__)} for every class in the tree; the first of several same-named
+# classes wins. Plain lists and dicts, so a table can be pickled or stored
+def class_table(tree):
+    classes = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef) and node.name not in classes:
+            functions = [item for item in node.body if isinstance(item, ast.FunctionDef)]
+            methods = {function.name: _param_names(function) for function in functions}
+            constructor = next((function for function in reversed(functions) if function.name == "__init__"), None)
+            fields = []
+            for child in ast.walk(constructor) if constructor else ():
+                if isinstance(child, ast.Attribute) and isinstance(child.ctx, ast.Store) \
+                        and isinstance(child.value, ast.Name) and child.value.id == "self" \
+                        and child.attr not in fields:
+                    fields.append(child.attr)
+            bases = [name for name in map(dotted_name, node.bases) if name is not None]
+            classes[node.name] = (bases, methods, fields)
+    return classes
+
+
+# Mutation Transformer Class
+class MutationTransformer(ast.NodeVisitor):
+    def __init__(self, mutation_type, class_view=None):
+        # A single operator, or a list of operators for the single-pass mode
+        if isinstance(mutation_type, str):
+            mutation_type = [mutation_type]
+        self.mutation_types = list(mutation_type)
+        # A class table to use instead of the tree's own, so classes of other
+        # modules can take part (see class_table)
+        self.class_view = class_view
+        self.sites = []
+
+    # Walk the tree once and record the sites of every enabled operator
+    def collect_sites(self, tree):
+        self._index_classes(tree)
+        self._groups = {}
+        self._path = []
+        self._scope = []
+        self.sites = []
+        self.visit_node(tree)
+        return self.sites
+
+    def visit_node(self, node):
+        for mutation_type in self.mutation_types:
+            find, _ = mutation_operators[mutation_type]
+            for key, label, arg in find(node, self):
+                self._add_site(mutation_type, key, label, getattr(node, "lineno", None), arg)
+
+        if isinstance(node, (ast.ClassDef, ast.FunctionDef)):
+            self._scope.append(node)
+        for field, value in ast.iter_fields(node):
+            if isinstance(value, list):
+                for index, item in enumerate(value):
+                    if isinstance(item, ast.AST):
+                        self._path.append((field, index))
+                        self.visit_node(item)
+                        self._path.pop()
+            elif isinstance(value, ast.AST):
+                self._path.append((field, None))
+                self.visit_node(value)
+                self._path.pop()
+        if isinstance(node, (ast.ClassDef, ast.FunctionDef)):
+            self._scope.pop()
+
+    def _add_site(self, mutation_type, key, label, lineno, arg):
+        path = tuple(self._path)
+        if key is not None and (mutation_type, key) in self._groups:
+            index = self._groups[(mutation_type, key)]
+            site = self.sites[index]
+            self.sites[index] = site._replace(paths=site.paths + (path,))
+            return
+        if key is not None:
+            self._groups[(mutation_type, key)] = len(self.sites)
+        self.sites.append(MutationSite(mutation_type, (path,), label, lineno, arg))
+
+    # Apply every site of the enabled operators to the tree at once
+    def visit(self, node):
+        return patch_tree(node, self.collect_sites(node))
+
+    # ---- Class table queries used by the site finders
+
+    def _index_classes(self, tree):
+        self.classes = self.class_view if self.class_view is not None else class_table(tree)
+        self.private_fields = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Attribute) and isinstance(node.ctx, ast.Store):
+                if node.attr.startswith("_") and not node.attr.startswith("__") and len(node.attr) > 1:
+                    self.private_fields.add(node.attr)
+
+        self.polymorphic = {}
+        for name, (_, methods, _) in self.classes.items():
+            root = self.hierarchy_root(name)
+            for method in methods:
+                self.polymorphic[(root, method)] = self.polymorphic.get((root, method), 0) + 1
+
+    def ancestors(self, class_name):
+        seen = []
+        pending = list(self.classes.get(class_name, ((), (), ()))[0])
+        while pending:
+            name = pending.pop(0)
+            if name in self.classes and name not in seen and name != class_name:
+                seen.append(name)
+                pending.extend(self.classes[name][0])
+        return seen
+
+    def hierarchy_root(self, class_name):
+        root, seen = class_name, {class_name}
+        while True:
+            bases = [base for base in self.classes[root][0] if base in self.classes and base not in seen]
+            if not bases:
+                return root
+            root = bases[0]
+            seen.add(root)
+
+    def overridden(self, class_name, method_name):
+        return any(method_name in self.classes[name][1] for name in self.ancestors(class_name))
+
+    def inherited_methods(self, class_name):
+        found = {}
+        for name in self.ancestors(class_name):
+            for method_name, params in self.classes[name][1].items():
+                found.setdefault(method_name, params)
+        return list(found.items())
+
+    def inherited_fields(self, class_name):
+        found = []
+        for name in self.ancestors(class_name):
+            found.extend(field for field in self.classes[name][2] if field not in found)
+        return found
+
+    def method_class(self, node):
+        # The class a FunctionDef is defined in, if it is a method
+        if isinstance(node, ast.FunctionDef) and self._scope and isinstance(self._scope[-1], ast.ClassDef):
+            return self._scope[-1]
+        return None
+
+
+# The node at a (field, index) path from the module root
+def node_at(tree, path):
+    node = tree
+    for field, index in path:
+        node = getattr(node, field)
+        if index is not None:
+            node = node[index]
+    return node
+
+
+# Build a trie of the site paths: {(field, index): subtrie, None: [mutations]}
+def _site_trie(sites):
+    trie = {}
+    for site in sites:
+        _, mutate = mutation_operators[site.operator]
+        for path in site.paths:
+            level = trie
+            for step in path:
+                level = level.setdefault(tuple(step), {})
+            level.setdefault(None, []).append((mutate, site.arg))
+    return trie
+
+
+def _patch_node(node, trie):
+    # Copy only the nodes on the way to a site; untouched siblings are shared
+    node = copy.copy(node)
+    fields = {}
+    for step, subtrie in trie.items():
+        if step is not None:
+            fields.setdefault(step[0], {})[step[1]] = subtrie
+    for field, children in fields.items():
+        value = getattr(node, field)
+        if isinstance(value, list):
+            patched = []
+            for index, item in enumerate(value):
+                if index in children:
+                    item = _patch_node(item, children[index])
+                    if item is None:
+                        continue
+                patched.append(item)
+            if field == "body" and not patched:
+                # A deleted last statement leaves an empty block
+                patched.append(ast.copy_location(ast.Pass(), node))
+            setattr(node, field, patched)
+        else:
+            setattr(node, field, _patch_node(value, children[None]))
+
+    if None in trie:
+        # The mutated node itself is deep-copied so the original stays intact
+        node = copy.deepcopy(node)
+        for mutate, arg in trie[None]:
+            node = mutate(node, arg)
+            if node is None:
+                break
+        else:
+            # Nodes the operator created get locations here, so the patched
+            # tree compiles without a fix_missing_locations pass over all of it
+            ast.fix_missing_locations(node)
+    return node
+
+
+# Return a mutated copy of the tree with the given sites applied, copying
+# only the subtrees the sites touch
+def patch_tree(tree, sites):
+    return _patch_node(tree, _site_trie(sites))
@@ -0,0 +1,299 @@
+import ast
+import importlib
+import importlib.util
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from mutant_loader import restore_package_mutant
+from mutation_cache import tree_hash
+from mutation_coverage import class_level, list_tests, resolve_test, site_lines
+from mutation_dedup import MutantDeduplicator
+from mutation_engine import DEFAULT_RUNNER, run_mutants
+from mutation_operators import class_table
+from mutation_sites import iter_mutants
+
+
+# {dotted module name: file} for every module of the package directory
+def package_modules(path):
+    path = os.path.abspath(path)
+    root = os.path.dirname(path)
+    modules = {}
+    for directory, subdirectories, files in os.walk(path):
+        if "__init__.py" not in files:
+            subdirectories[:] = []
+            continue
+        subdirectories[:] = sorted(name for name in subdirectories if not name.startswith((".", "__")))
+        package = os.path.relpath(directory, root).replace(os.sep, ".")
+        for name in sorted(files):
+            if name.endswith(".py"):
+                module = package if name == "__init__.py" else f"{package}.{name[:-3]}"
+                modules[module] = os.path.join(directory, name)
+    return modules
+
+
+# The module an import statement names, relative imports resolved against
+# the importing module's package
+def _import_target(package, node):
+    base = package.split(".")
+    base = ".".join(base[:len(base) - node.level + 1]) if node.level else ""
+    return ".".join(part for part in (base, node.module) if part)
+
+
+# Modules a module imports, with relative imports resolved against its package
+def module_imports(module_name, tree, is_package=False):
+    package = module_name if is_package else module_name.rpartition(".")[0]
+    imported = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imported.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            target = _import_target(package, node)
+            imported.add(target)
+            # `from pkg import module` imports a submodule, not a name
+            imported.update(f"{target}.{alias.name}" for alias in node.names)
+    return imported
+
+
+# {local name: dotted name it is bound to} for the top-level imports of a
+# module, e.g. {"Animal": "zoo.animals.Animal"} for `from .animals import Animal`
+def module_aliases(module_name, tree, is_package=False):
+    package = module_name if is_package else module_name.rpartition(".")[0]
+    aliases = {}
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    aliases[alias.asname] = alias.name
+                else:
+                    head = alias.name.partition(".")[0]
+                    aliases[head] = head
+        elif isinstance(node, ast.ImportFrom):
+            target = _import_target(package, node)
+            aliases.update((alias.asname or alias.name, f"{target}.{alias.name}")
+                           for alias in node.names if alias.name != "*")
+    return aliases
+
+
+def _scan_module(item):
+    module_name, path, is_package = item
+    with open(path, "r") as f:
+        tree = ast.parse(f.read())
+    return (module_name, module_imports(module_name, tree, is_package), module_aliases(module_name, tree, is_package),
+            class_table(tree))
+
+
+# {qualified class name: (qualified bases, methods, fields)} over a whole
+# package, from {module: (imports, aliases, class table)} scans. Each base is
+# resolved through the imports of the module that names it, following
+# re-exports such as `from .animals import Animal` in __init__.py; bases from
+# outside the package are dropped, as a single module drops unknown ones
+def package_classes(scans):
+    qualified = {f"{module_name}.{name}" for module_name, (_, _, table) in scans.items() for name in table}
+
+    def resolve(module_name, name):
+        head, _, rest = name.partition(".")
+        if not rest and head in scans[module_name][2]:
+            target = f"{module_name}.{name}"
+        elif head in scans[module_name][1]:
+            target = ".".join(part for part in (scans[module_name][1][head], rest) if part)
+        else:
+            return None
+        for _ in range(len(scans) + 1):
+            if target in qualified:
+                return target
+            module, _, attribute = target.rpartition(".")
+            if module not in scans or attribute not in scans[module][1]:
+                return None
+            target = scans[module][1][attribute]
+        return None
+
+    classes = {}
+    for module_name, (_, _, table) in scans.items():
+        for name, (bases, methods, fields) in table.items():
+            resolved = [resolve(module_name, base) for base in bases]
+            classes[f"{module_name}.{name}"] = ([base for base in resolved if base], methods, fields)
+    return classes
+
+
+# The package class table as one module sees it: its own classes under their
+# bare names, every other class under its qualified name
+def class_view(classes, module_name):
+    prefix = f"{module_name}."
+
+    def local(name):
+        own = name[len(prefix):] if name.startswith(prefix) else None
+        return own if own and "." not in own else name
+
+    return {local(name): ([local(base) for base in bases], methods, fields)
+            for name, (bases, methods, fields) in classes.items()}
+
+
+# The top-level statements a mutant changed, {index: statement}, or the whole
+# tree when it adds or removes statements; patch_tree shares the rest
+def _changed_statements(tree, mutated_tree):
+    if len(mutated_tree.body) != len(tree.body):
+        return mutated_tree
+    return {index: statement for index, (statement, original) in enumerate(zip(mutated_tree.body, tree.body))
+            if statement is not original}
+
+
+# Parse one module and build all of its mutants: (mutation id, covered lines
+# or None for a class-level site, hash, dedup verdict, changed statements)
+def _mutate_module(item):
+    module_name, path, mutations, view = item
+    with open(path, "r") as f:
+        source_code = f.read()
+    tree = ast.parse(source_code)
+    deduplicator = MutantDeduplicator(tree)
+    mutants = []
+    for mutant in iter_mutants(source_code, mutations, tree=tree, class_view=view):
+        site = mutant.site
+        mutation = f"{site.operator}:{module_name}.{site.label}@{site.lineno}"
+        mutated_tree = mutant.tree()
+        digest = tree_hash(mutated_tree)
+        lines = None if class_level(tree, site) else site_lines(tree, site)
+        duplicate = deduplicator.check(mutation, digest)
+        statements = None if duplicate is not None else _changed_statements(tree, mutated_tree)
+        mutants.append((mutation, lines, digest, duplicate, statements))
+    return module_name, mutants
+
+
+# Parse and mutate every module of the package over a process pool. A first
+# pass reads each module's imports and classes, so a second one can find the
+# sites of every module against the class table of the whole package (a
+# subclass of a class in another module gets its IHI, OMD, ... sites).
+# Returns the import graph and [(module, mutants)] in module order
+def mutate_package(modules, mutations, test_module, workers=None):
+    items = [(module_name, path, path.endswith("__init__.py")) for module_name, path in modules.items()]
+    chunksize = max(1, len(items) // ((workers or os.cpu_count() or 1) * 4))
+    with ProcessPoolExecutor(workers) as executor:
+        scans = {scan[0]: scan[1:] for scan in executor.map(_scan_module, items, chunksize=chunksize)}
+        classes = package_classes(scans)
+        items = [(module_name, path, mutations, class_view(classes, module_name))
+                 for module_name, path in modules.items()]
+        mutants = list(executor.map(_mutate_module, items, chunksize=chunksize))
+
+    with open(importlib.util.find_spec(test_module).origin, "r") as f:
+        imports = {module_name: scan[0] for module_name, scan in scans.items()}
+        imports[test_module] = module_imports(test_module, ast.parse(f.read()))
+    return import_graph(imports), mutants
+
+
+# {module: modules that import it directly}, from {module: imported modules}
+# for the package modules and the test module
+def import_graph(imports):
+    importers = {module_name: set() for module_name in imports}
+    for module_name, imported_modules in imports.items():
+        for imported in imported_modules:
+            if imported in importers and imported != module_name:
+                importers[imported].add(module_name)
+    return importers
+
+
+# Every module that imports module_name directly or through other modules,
+# each after the ones among them it imports, the order load_package_mutant
+# rebuilds them in. An import cycle is broken at its first module by name
+def dependents(graph, module_name):
+    found, pending = set(), [module_name]
+    while pending:
+        for importer in graph.get(pending.pop(), ()):
+            if importer not in found:
+                found.add(importer)
+                pending.append(importer)
+    imports = {importer: {imported for imported in found if importer in graph.get(imported, ())}
+               for importer in found}
+    ordered, remaining = [], set(found)
+    while remaining:
+        ready = sorted(importer for importer in remaining if not imports[importer] & remaining) or [min(remaining)]
+        ordered.extend(ready)
+        remaining.difference_update(ready)
+    return tuple(ordered)
+
+
+# Run every test against the unmutated package as imported from disk and
+# record the lines each test executes per file: {test: {path: lines}}
+def collect_package_coverage(modules, test_module):
+    paths = {os.path.abspath(path) for path in modules.values()}
+    module = importlib.import_module(test_module)
+    coverage = {}
+    for test_name in list_tests(module):
+        lines = {}
+
+        def trace(frame, event, arg):
+            if frame.f_code.co_filename not in paths:
+                return None
+            if event == "line":
+                lines.setdefault(frame.f_code.co_filename, set()).add(frame.f_lineno)
+            return trace
+
+        test_class, method_name = resolve_test(module, test_name)
+        test_case = test_class(method_name)
+        sys.settrace(trace)
+        try:
+            test_case.setUp()
+            getattr(test_case, method_name)()
+        except Exception as e:
+            print(f"Test '{test_name}' fails on the original code, skipping it. Error: {e}")
+            continue
+        finally:
+            sys.settrace(None)
+        coverage[test_name] = lines
+    return coverage
+
+
+# Mutation campaign over a whole package directory. Modules are parsed and
+# mutated in parallel (see mutate_package), and each mutant replaces its own
+# module in the workers, with its importers rebuilt on it. Mutant ids carry
+# the module: "PPD:zoo.animals.Dog.__init__@4"
+def run_package_mutations(package_dir, mutations, test_module, workers=None, coverage=True, timeout=10,
+                          runner=DEFAULT_RUNNER, on_result=None):
+    package_dir = os.path.abspath(package_dir)
+    if os.path.dirname(package_dir) not in sys.path:
+        sys.path.insert(0, os.path.dirname(package_dir))
+    modules = package_modules(package_dir)
+    graph, generated = mutate_package(modules, mutations, test_module, workers)
+    if coverage:
+        test_coverage = collect_package_coverage(modules, test_module)
+    all_tests = list_tests(importlib.import_module(test_module))
+
+    results = []
+    identities = {}
+    position = 0
+
+    def jobs():
+        nonlocal position
+        for module_name, mutants in generated:
+            path = os.path.abspath(modules[module_name])
+            importers = dependents(graph, module_name)
+            is_package = modules[module_name].endswith("__init__.py")
+            for mutation, lines, digest, duplicate, statements in mutants:
+                if not coverage:
+                    tests = all_tests
+                elif lines is None:
+                    tests = list(test_coverage)
+                else:
+                    tests = [test for test, covered in test_coverage.items() if covered.get(path, set()) & lines]
+                identity = {"module": module_name, "index": position, "hash": digest}
+                position += 1
+                if duplicate is not None:
+                    status = "unchanged" if duplicate == "unchanged" else "duplicate"
+                    result = {"mutation": mutation, "status": status, "killed": False, **identity}
+                    if status == "duplicate":
+                        result["duplicate_of"] = duplicate[1]
+                    results.append(result)
+                    if on_result is not None:
+                        on_result(result)
+                    continue
+                identities[mutation] = identity
+                yield mutation, tests, (module_name, statements, importers, is_package)
+
+    try:
+        for result in run_mutants(jobs(), runner, workers, timeout, test_module, None, test_module):
+            result.update(identities.pop(result["mutation"]))
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    finally:
+        restore_package_mutant()
+    return results
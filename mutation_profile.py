@@ -0,0 +1,94 @@
+import contextlib
+import cProfile
+import os
+import re
+import resource
+import time
+import tracemalloc
+
+from mutation_engine import run_mutant_test
+from mutation_sites import iter_mutants
+
+
+def _max_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+# Accumulates wall time, CPU time and call counts per named phase. With
+# track_memory, tracemalloc also records the peak Python allocation of each
+# phase, which costs some speed, so it is opt-in
+class PhaseProfiler:
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.phases = {}
+        self.started = time.perf_counter()
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        stats = self.phases.setdefault(name, {"calls": 0, "wall": 0.0, "cpu": 0.0, "peak_kb": 0})
+        if self.track_memory:
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            stats["calls"] += 1
+            stats["wall"] += time.perf_counter() - wall
+            stats["cpu"] += time.process_time() - cpu
+            if self.track_memory:
+                stats["peak_kb"] = max(stats["peak_kb"], tracemalloc.get_traced_memory()[1] // 1024)
+
+    def stop(self):
+        if self.track_memory:
+            tracemalloc.stop()
+
+
+# Structured report: campaign phases in this process, the load/test phases
+# summed over the workers, and the slowest mutants with their own phases
+def profile_report(profiler, results, slowest=10):
+    worker_phases = {}
+    for result in results:
+        for name, stats in (result.get("phases") or {}).items():
+            total = worker_phases.setdefault(name, {"calls": 0, "wall": 0.0, "cpu": 0.0})
+            total["calls"] += 1
+            total["wall"] += stats["wall"]
+            total["cpu"] += stats["cpu"]
+
+    timed = [result for result in results if result.get("duration") is not None and not result.get("cached")]
+    timed.sort(key=lambda result: result["duration"], reverse=True)
+    return {
+        "wall": time.perf_counter() - profiler.started,
+        "max_rss_kb": _max_rss_kb(),
+        "phases": profiler.phases,
+        "worker_phases": worker_phases,
+        "slowest_mutants": [
+            {"mutation": result["mutation"], "status": result["status"], "duration": result["duration"],
+             "phases": result.get("phases"), "peak_kb": result.get("peak_kb")}
+            for result in timed[:slowest]
+        ],
+    }
+
+
+# Re-run the slowest mutants in this process under cProfile and write one
+# .prof file each; the pstats files load into snakeviz, flameprof and the like
+def dump_profiles(source_code, results, directory, count=5, test_module="mutation_test", module_name="mutant"):
+    timed = [result for result in results if result.get("duration") is not None and not result.get("cached")]
+    timed.sort(key=lambda result: result["duration"], reverse=True)
+    wanted = {result["mutation"]: result.get("tests") or [] for result in timed[:count]}
+    operators = sorted({mutation.split(":", 1)[0] for mutation in wanted})
+
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    for mutant in iter_mutants(source_code, operators):
+        if mutant.id not in wanted:
+            continue
+        profiler = cProfile.Profile()
+        profiler.enable()
+        run_mutant_test(mutant.id, wanted[mutant.id], mutant.tree(), test_module, module_name=module_name)
+        profiler.disable()
+        path = os.path.join(directory, re.sub(r"[^\w.@-]", "_", mutant.id) + ".prof")
+        profiler.dump_stats(path)
+        written.append(path)
+    return written
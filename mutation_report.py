@@ -0,0 +1,134 @@
+import json
+import xml.etree.ElementTree as ET
+
+
+def _counts(results):
+    killed = sum(1 for result in results if result["status"] in ("killed", "timeout"))
+    survived = sum(1 for result in results if result["status"] == "survived")
+    skipped = len(results) - killed - survived
+    score = killed / (killed + survived) * 100 if killed + survived else 0.0
+    return {"killed": killed, "survived": survived, "skipped": skipped, "score": score}
+
+
+# Killed/survived/skipped counts and the score for a list of mutant results.
+# Unchanged and duplicate mutants are skipped and left out of the score. The
+# score is that of the first-order mutants; higher-order ones (results with
+# an "order" above 1) are counted apart, under "higher_order" by order, as
+# they are only built from first-order survivors and would skew it
+def summarize(results):
+    summary = _counts([result for result in results if result.get("order", 1) == 1])
+    orders = sorted({result["order"] for result in results if result.get("order", 1) > 1})
+    if orders:
+        summary["higher_order"] = {str(order): _counts([result for result in results if result.get("order") == order])
+                                   for order in orders}
+    return summary
+
+
+# estimate is the sampled score estimate from estimate_score, if any. scope
+# is "dominators" when the mutants a kill matrix found subsumed were skipped,
+# which makes the score one over the dominator mutants only. shard is the
+# (i, N) of a --shard run, recorded as "i/N" so merge_results can check it
+# A shard report also records the operators and the hash of the target
+# source it ran with, which merge_results checks across the shards
+def write_json(results, stream, target=None, tests=None, estimate=None, scope=None, shard=None, operators=None,
+               source_hash=None):
+    report = {"target": target, "tests": tests, **summarize(results), "mutants": results}
+    if shard is not None:
+        report.update(shard=f"{shard[0]}/{shard[1]}", operators=operators, source_hash=source_hash)
+    if scope is not None:
+        report["scope"] = scope
+    if estimate is not None:
+        report["estimate"] = estimate
+    json.dump(report, stream, indent=2)
+    stream.write("\n")
+
+
+# One <testcase> per mutant: survivors are failures, since no test caught
+# them, and unchanged or duplicate mutants are skipped
+def write_junit(results, stream, target=None, tests=None, estimate=None, scope=None, shard=None, operators=None,
+                source_hash=None):
+    # Every survivor is a failing test case, whatever its order
+    summary = _counts(results)
+    suite = ET.Element("testsuite", name=f"mutation:{target}", tests=str(len(results)),
+                       failures=str(summary["survived"]), skipped=str(summary["skipped"]),
+                       time=f"{sum(result.get('duration') or 0 for result in results):.6f}")
+    if estimate is not None or scope is not None or shard is not None:
+        properties = ET.SubElement(suite, "properties")
+    if shard is not None:
+        ET.SubElement(properties, "property", name="shard", value=f"{shard[0]}/{shard[1]}")
+        ET.SubElement(properties, "property", name="operators", value=",".join(operators or []))
+        ET.SubElement(properties, "property", name="source_hash", value=source_hash or "")
+    if scope is not None:
+        ET.SubElement(properties, "property", name="scope", value=scope)
+    if estimate is not None:
+        for name in ("score", "low", "high", "confidence", "sampled", "population"):
+            ET.SubElement(properties, "property", name=f"estimate.{name}", value=str(estimate[name]))
+        if estimate["unsampled"]:
+            ET.SubElement(properties, "property", name="estimate.unsampled",
+                          value=",".join(sorted(estimate["unsampled"])))
+    for result in results:
+        case = ET.SubElement(suite, "testcase", classname=result["mutation"].split(":", 1)[0],
+                             name=result["mutation"], time=f"{result.get('duration') or 0:.6f}")
+        if result["status"] == "survived":
+            failure = ET.SubElement(case, "failure", message="mutant survived")
+            failure.text = f"tests run: {', '.join(result.get('tests') or [])}"
+        elif result["status"] in ("unchanged", "duplicate"):
+            ET.SubElement(case, "skipped", message=result["status"])
+        else:
+            ET.SubElement(case, "system-out").text = f"killed by {result.get('test')}: {result.get('error')}"
+    stream.write(ET.tostring(suite, encoding="unicode"))
+    stream.write("\n")
+
+
+# Combine the JSON reports of the shards of one campaign into a single
+# result list. Results are put back in generation order, and a mutant that
+# duplicates an earlier one on another shard is marked as a duplicate, which
+# gives the same results and score as a single-node run. The reports must be
+# exactly shards 1/N to N/N of one target, run with the same operators on the
+# same source; anything else raises ValueError
+def merge_results(paths):
+    results = []
+    shards = {}
+    targets = set()
+    campaigns = {}
+    for path in paths:
+        with open(path, "r") as f:
+            report = json.load(f)
+        if "shard" not in report:
+            raise ValueError(f"{path} is not the report of a --shard run")
+        if not report.get("operators") or not report.get("source_hash"):
+            raise ValueError(f"{path} does not record the operators and source its shard ran with")
+        index, count = (int(part) for part in report["shard"].split("/"))
+        if index in shards:
+            raise ValueError(f"{path} and {shards[index]} are both shard {report['shard']}")
+        shards[index] = path
+        targets.add((report.get("target"), count))
+        campaigns.setdefault((tuple(report["operators"]), report["source_hash"]), []).append(path)
+        results.extend(report["mutants"])
+    if len(targets) > 1:
+        raise ValueError("the reports are shards of different campaigns: "
+                         + ", ".join(f"{target} split {count} ways" for target, count in sorted(targets, key=str)))
+    if len(campaigns) > 1:
+        raise ValueError("the shards ran with different operators or target sources: " + "; ".join(
+            f"{', '.join(files)} ran {','.join(operators)} on source {source[:12]}"
+            for (operators, source), files in campaigns.items()))
+    count = next(iter(targets))[1]
+    missing = sorted(set(range(1, count + 1)) - set(shards))
+    if missing:
+        raise ValueError(f"shard(s) {', '.join(f'{index}/{count}' for index in missing)} are missing")
+    results.sort(key=lambda result: result["index"])
+
+    first = {}
+    for result in results:
+        if result["status"] == "unchanged":
+            continue
+        if result["hash"] in first and result["status"] != "duplicate":
+            result.update(status="duplicate", killed=False, duplicate_of=first[result["hash"]])
+        first.setdefault(result["hash"], result["mutation"])
+    return results
+
+
+report_writers = {
+    "json": write_json,
+    "junit": write_junit,
+}
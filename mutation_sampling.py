@@ -0,0 +1,70 @@
+import math
+import random
+from statistics import NormalDist
+
+
+# Stratified random order of (mutant, tests) items, one stratum per
+# operator: every stratum is shuffled with the seed, then the next item is
+# always taken from the stratum with the smallest share sampled so far. Any
+# prefix of the order is therefore a proportional stratified sample, so a
+# campaign can stop after a mutant or time budget at any point
+def stratified_order(items, seed):
+    strata = {}
+    for item in items:
+        strata.setdefault(item[0].operator, []).append(item)
+    generator = random.Random(seed)
+    for members in strata.values():
+        generator.shuffle(members)
+
+    taken = {operator: 0 for operator in strata}
+    order = []
+    while len(order) < sum(len(members) for members in strata.values()):
+        operator = min((operator for operator in strata if taken[operator] < len(strata[operator])),
+                       key=lambda operator: (taken[operator] / len(strata[operator]), operator))
+        order.append(strata[operator][taken[operator]])
+        taken[operator] += 1
+    return order
+
+
+# Stratified estimate of the mutation score of the whole population from the
+# results of a sample, with a normal-approximation confidence interval and
+# the finite population correction. The variance uses the Laplace-smoothed
+# share (k + 1) / (n + 2), so a stratum sampled once or found all killed does
+# not claim zero uncertainty. population is {operator: mutant count}.
+# Operators none of whose mutants were sampled cannot be estimated: the
+# estimate covers only the population of the others, and the rest is listed
+# under "unsampled" as {operator: mutant count}
+def estimate_score(results, population, confidence=0.95):
+    if not 0 < confidence < 1:
+        raise ValueError(f"confidence must be between 0 and 1, not {confidence}")
+    counts = {}
+    for result in results:
+        if result["status"] in ("killed", "timeout", "survived"):
+            stats = counts.setdefault(result["mutation"].split(":", 1)[0], [0, 0])
+            stats[0] += result["status"] != "survived"
+            stats[1] += 1
+
+    total = sum(population[operator] for operator in counts)
+    score = variance = 0.0
+    strata = {}
+    for operator, (killed, sampled) in counts.items():
+        size = population[operator]
+        weight = size / total
+        share = killed / sampled
+        score += weight * share
+        smoothed = (killed + 1) / (sampled + 2)
+        if size > 1:
+            variance += weight ** 2 * smoothed * (1 - smoothed) / sampled * (size - sampled) / (size - 1)
+        strata[operator] = {"population": size, "sampled": sampled, "killed": killed, "score": share * 100}
+
+    margin = NormalDist().inv_cdf(0.5 + confidence / 2) * math.sqrt(variance)
+    return {
+        "score": score * 100,
+        "low": max(0.0, score - margin) * 100,
+        "high": min(1.0, score + margin) * 100,
+        "confidence": confidence,
+        "sampled": sum(sampled for _, sampled in counts.values()),
+        "population": total,
+        "unsampled": {operator: size for operator, size in population.items() if operator not in counts},
+        "strata": strata,
+    }
@@ -0,0 +1,74 @@
+import os
+import sqlite3
+
+
+# Kill counts and timings from earlier runs, used to order the work of the
+# next one. Each test is tracked per mutant site and per operator, so a new
+# site still benefits from what its operator's other sites taught
+class TestHistory:
+    def __init__(self, path=".mutation_cache/history.sqlite"):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS tests ("
+            "scope TEXT, test TEXT, runs INTEGER, kills INTEGER, seconds REAL, timed INTEGER, "
+            "PRIMARY KEY (scope, test))"
+        )
+        self.connection.execute("CREATE TABLE IF NOT EXISTS mutants (site TEXT PRIMARY KEY, duration REAL)")
+        self.tests = {(scope, test): [runs, kills, seconds, timed] for scope, test, runs, kills, seconds, timed
+                      in self.connection.execute("SELECT * FROM tests")}
+        self.durations = dict(self.connection.execute("SELECT * FROM mutants"))
+        self.costs = {}
+        for (scope, test), (_, _, seconds, timed) in self.tests.items():
+            # Operator scopes ("PPD") hold every timing once; site ids ("PPD:Dog.__init__@15") repeat them
+            if ":" not in scope and timed:
+                total = self.costs.setdefault(test, [0.0, 0])
+                total[0] += seconds
+                total[1] += timed
+
+    # Laplace-smoothed share of runs in which the test killed the mutant,
+    # from the site's own history when it has one, else its operator's
+    def kill_probability(self, site, test):
+        for scope in (site.id, site.operator):
+            stats = self.tests.get((scope, test))
+            if stats:
+                return (stats[1] + 1) / (stats[0] + 2)
+        return 0.5
+
+    # Mean seconds a test took against earlier mutants; 0 when never timed
+    def test_cost(self, test):
+        seconds, timed = self.costs.get(test, (0.0, 0))
+        return seconds / timed if timed else 0.0
+
+    # The likeliest killer first and, among equally likely tests, the cheapest
+    def order_tests(self, site, tests):
+        return sorted(tests, key=lambda test: (-self.kill_probability(site, test), self.test_cost(test)))
+
+    # Seconds the mutant took last time, else the cost of all its tests
+    def expected_duration(self, site, tests):
+        if site.id in self.durations:
+            return self.durations[site.id]
+        return sum(self.test_cost(test) for test in tests)
+
+    def record(self, site, result):
+        durations = result.get("test_durations") or {}
+        for test in result.get("tests") or ():
+            killed = result["killed"] and test == result.get("test")
+            for scope in (site.id, site.operator):
+                stats = self.tests.setdefault((scope, test), [0, 0, 0.0, 0])
+                stats[0] += 1
+                stats[1] += int(killed)
+                if test in durations:
+                    stats[2] += durations[test]
+                    stats[3] += 1
+        if result.get("duration") is not None:
+            self.durations[site.id] = result["duration"]
+
+    def close(self):
+        self.connection.executemany("INSERT OR REPLACE INTO tests VALUES (?, ?, ?, ?, ?, ?)",
+                                    [(scope, test, *stats) for (scope, test), stats in self.tests.items()])
+        self.connection.executemany("INSERT OR REPLACE INTO mutants VALUES (?, ?)", self.durations.items())
+        self.connection.commit()
+        self.connection.close()
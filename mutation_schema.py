@@ -0,0 +1,87 @@
+import ast
+import copy
+
+from mutation_operators import node_at
+
+
+# Module global the schema functions read to pick their variant
+ACTIVE_NAME = "__mutant_active__"
+
+
+def _dump(value):
+    if isinstance(value, list):
+        return [_dump(item) for item in value]
+    return ast.dump(value) if isinstance(value, ast.AST) else value
+
+
+def _same_signature(original, mutated):
+    return isinstance(mutated, type(original)) and mutated.name == original.name and all(
+        _dump(getattr(original, field)) == _dump(getattr(mutated, field))
+        for field in ("args", "returns", "decorator_list"))
+
+
+# The functions a mutant rewrites, as {function path: mutated body}, when the
+# mutation only changes function bodies and can therefore be expressed as a
+# runtime branch; None for structural mutations (deleted or added methods,
+# changed signatures or bases), which have to be loaded as separate modules
+def switchable_bodies(tree, mutant):
+    mutated = mutant.tree()
+    bodies = {}
+    for path in mutant.site.paths:
+        function_path = None
+        for length in range(len(path), 0, -1):
+            if isinstance(node_at(tree, path[:length]), (ast.FunctionDef, ast.AsyncFunctionDef)):
+                function_path = path[:length]
+                break
+        if function_path is None:
+            return None
+        original = node_at(tree, function_path)
+        try:
+            changed = node_at(mutated, function_path)
+        except (AttributeError, IndexError):
+            return None
+        if not _same_signature(original, changed):
+            return None
+        bodies[function_path] = changed.body
+    return bodies
+
+
+def _switch(mutation, body, orelse):
+    test = ast.Compare(left=ast.Name(id=ACTIVE_NAME, ctx=ast.Load()), ops=[ast.Eq()],
+                       comparators=[ast.Constant(value=mutation)])
+    return ast.If(test=test, body=body, orelse=orelse)
+
+
+# Mutant schemata: one module holding every switchable mutant. Each mutated
+# function body becomes an if/elif chain on ACTIVE_NAME with the original
+# body as the final else, so setting the module global to a mutant id
+# activates that mutant without loading anything. Returns the schema tree and
+# the ids of the mutants it holds
+def build_schema(tree, mutants):
+    variants = {}
+    for mutant in mutants:
+        bodies = switchable_bodies(tree, mutant)
+        if bodies:
+            for function_path, body in bodies.items():
+                variants.setdefault(function_path, []).append((mutant.id, body))
+
+    # A function nested in another switched function would be copied into
+    # every branch of its parent; its mutants are loaded the usual way
+    nested = {path for path in variants for other in variants if other != path and path[:len(other)] == other}
+    excluded = {mutation for path in nested for mutation, _ in variants[path]}
+    schema = copy.deepcopy(tree)
+    held = set()
+    for function_path, bodies in variants.items():
+        if function_path in nested:
+            continue
+        function = node_at(schema, function_path)
+        switch = function.body
+        for mutation, body in reversed(bodies):
+            if mutation not in excluded:
+                switch = [_switch(mutation, copy.deepcopy(body), switch)]
+                held.add(mutation)
+        function.body = switch
+
+    active = ast.Assign(targets=[ast.Name(id=ACTIVE_NAME, ctx=ast.Store())], value=ast.Constant(value=None))
+    schema.body.insert(0, active)
+    return ast.fix_missing_locations(schema), held
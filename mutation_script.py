@@ -1,9 +1,28 @@
+import argparse
 import ast
-import astor
+import contextlib
+import importlib.util
+import json
 import os
-from consolemenu import *
-from consolemenu.items import *
-from mutation_test import TestAnimalBehavior
+import random
+import sys
+import time
+from collections import namedtuple
+from mutation_cache import ResultCache, result_key, test_suite_hash, tree_hash
+from mutation_coverage import collect_coverage, tests_for_site
+from mutation_dedup import MutantDeduplicator
+from mutation_engine import DEFAULT_RUNNER, mutant_runners, run_mutants
+from mutation_matrix import KillMatrix
+from mutation_operators import mutation_operators
+from mutation_package import run_package_mutations
+from mutation_profile import PhaseProfiler, dump_profiles, profile_report
+from mutation_report import merge_results, report_writers, summarize
+from mutation_sampling import estimate_score, stratified_order
+from mutation_schedule import TestHistory
+from mutation_schema import build_schema
+from mutation_static import StaticAnalyzer
+from mutation_watch import MutationDaemon
+from mutation_sites import build_site_index, iter_higher_order, iter_mutants, parse_shard, source_hash
 
 
 mutation_test_map = {
@@ -22,233 +41,526 @@ mutation_test_map = {
     }
 
 
+def _report_result(result):
+    if result["status"] == "unchanged":
+        print(f"Mutant {result['mutation']} leaves the code unchanged, skipping it")
+        return
+    if result["status"] == "duplicate":
+        print(f"Mutant {result['mutation']} duplicates {result['duplicate_of']}, skipping it")
+        return
+    if result.get("static"):
+        print(f"Mutant {result['mutation']}: {result['error']} (test '{result['test']}')")
+        return
+    cached = " (cached)" if result.get("cached") else ""
+    print(f"Running {len(result['tests'])} test(s) for mutant: {result['mutation']}{cached}")
+    if result["status"] == "timeout":
+        print(f"Test '{result['test']}' killed the mutant by timeout! Error: {result['error']}")
+    elif result["killed"]:
+        print(f"Test '{result['test']}' failed! Error: {result['error']}")
+    else:
+        print("Tests passed!")
+
+
+# What a campaign returns: every result in the order it finished, the
+# Mutant of each survivor, the sampled score estimate (sample or budget), the
+# KillMatrix (kill_matrix) and the PhaseProfiler holding the campaign phases
+Campaign = namedtuple("Campaign", ["results", "survivors", "estimate", "matrix", "profiler"])
+
+
+def run_tests_for_mutations(mutations=None, input_file="original_code.py", workers=None, coverage=True, cache=True, timeout=10,
+                            runner=DEFAULT_RUNNER, test_module="mutation_test", module_name="mutant", shard=None,
+                            profile=False, schema=False, schedule=True, sample=None, budget=None, seed=None,
+                            confidence=0.95, events=None, order=1, kill_matrix=False, skip=None, static=True):
+    # events is an EventBus that gets generated, started, killed, survived,
+    # timeout and skipped events for every mutant
+    def publish(kind, **fields):
+        if events is not None:
+            events.publish(kind, **fields)
+
+    def record_result(result, mutant=None):
+        _report_result(result)
+        if result["status"] in ("unchanged", "duplicate"):
+            publish("skipped", mutation=result["mutation"], reason=result["status"])
+        else:
+            publish(result["status"], mutation=result["mutation"], test=result.get("test"),
+                    duration=result.get("duration"), cached=bool(result.get("cached")))
+        mutation_results.append(result)
+        if result["status"] == "survived":
+            surviving_mutants.append(mutant)
+
+    if order > 1 and shard is not None:
+        # Higher-order mutants combine the survivors of the whole campaign
+        raise ValueError("higher-order mutants cannot be generated on a shard")
+    if schema and runner != "fork":
+        # Outside a forked child every activation runs the whole schema
+        # module again, which costs more than loading the mutant by itself
+        raise ValueError("schemata need the fork runner")
+    # Wall and CPU time per phase are always recorded; profile=True also
+    # tracks peak memory per phase
+    phase_profiler = PhaseProfiler(track_memory=profile)
+    phase = phase_profiler.phase
+    surviving_mutants = []
+    mutation_results = []
+    score_estimate = None
+    mutation_matrix = None
+    if mutations is None:
+        mutations = list(mutation_operators)
+
+    # A package directory is mutated module by module; coverage, dedup and
+    # the runners apply, the single-file extras (static kills included) do not
+    if os.path.isdir(input_file):
+        if shard is not None or sample is not None or budget is not None or order > 1 or schema or kill_matrix \
+                or skip:
+            raise ValueError("sharding, sampling, higher orders, schemata and kill matrices need a single-file target")
+        try:
+            run_package_mutations(input_file, mutations, test_module, workers=workers, coverage=coverage,
+                                  timeout=timeout, runner=runner, on_result=record_result)
+        finally:
+            phase_profiler.stop()
+        return Campaign(mutation_results, surviving_mutants, None, None, phase_profiler)
 
-# Mutation Transformer Class
-class MutationTransformer(ast.NodeTransformer):
-    def __init__(self, mutation_type):
-        self.mutation_type = mutation_type
-
-    def visit_FunctionDef(self, node):
-        # Handle method-related mutations
-        if self.mutation_type == "PMD":  # Polymorphic Method Deletion
-            if node.name == "make_sound":
-                return None  # Delete the function
-
-        elif self.mutation_type == "OMD":  # Overriding Method Deletion
-            if node.name == "get_info":
-                return None  # Delete the overridden method
-
-        elif self.mutation_type == "IOD":  # Incorrect Method Overriding
-            if node.name == "make_sound":
-                # Change the method signature
-                node.args.args.append(ast.arg(arg="loud", annotation=None))
-                node.body = [
-                    ast.Return(
-                        value=ast.IfExp(
-                            test=ast.Name(id="loud", ctx=ast.Load()),
-                            body=ast.Constant(value="Loud Bark!"),
-                            orelse=ast.Constant(value="Bark!"),
-                        )
-                    )
-                ]
-
-        elif self.mutation_type == "ISI":  # Insert Super Invocation
-            if node.name == "make_sound":
-                super_call = ast.Expr(
-                    value=ast.Call(
-                        func=ast.Attribute(
-                            value=ast.Call(func=ast.Name(id="super", ctx=ast.Load()), args=[], keywords=[]),
-                            attr="make_sound",
-                            ctx=ast.Load(),
-                        ),
-                        args=[],
-                        keywords=[],
-                    )
-                )
-                node.body.insert(0, super_call)
-
-        elif self.mutation_type == "OAC":  # Argument Change
-            if node.name == "get_info":
-                # Add a new argument to the method
-                node.args.args.append(ast.arg(arg="detailed", annotation=None))
-
-                node.body = [
-                    ast.If(
-                        test=ast.Name(id="detailed", ctx=ast.Load()),
-                        body=[
-                            ast.Return(value=ast.Constant(value="Detailed information provided."))
-                        ],
-                        orelse=[
-                            ast.Return(value=ast.Constant(value="Basic information provided."))
-                        ],
-                    )
-                ]
-
-        elif self.mutation_type == "PPD":  # Parameter Deletion
-            if node.name == "__init__":
-                if len(node.args.args) > 2:  # Ensure at least one parameter exists
-                    node.args.args.pop(-1)  # Remove the last parameter
-
-        return self.generic_visit(node)
-
-    def visit_ClassDef(self, node):
-        # Handle class-related mutations
-        if self.mutation_type == "IHI":  # Hiding a Method in Subclass
-            if node.name == "Dog":
-                new_method = ast.FunctionDef(
-                    name="get_info",
-                    args=ast.arguments(
-                        posonlyargs=[],
-                        args=[ast.arg(arg="self", annotation=None)],
-                        vararg=None,
-                        kwarg=None,
-                        kwonlyargs=[],
-                        kw_defaults=[],
-                        defaults=[],
-                    ),
-                    body=[ast.Return(value=ast.Constant(value="Hidden method in Dog"))],
-                    decorator_list=[],
-                )
-                node.body.append(new_method)
-
-        elif self.mutation_type == "IHD":  # Hiding a Field in Subclass
-            if node.name == "Animal":
-                new_field = ast.Assign(
-                    targets=[
-                        ast.Attribute(value=ast.Name(id="self", ctx=ast.Load()), attr="name", ctx=ast.Store())
-                    ],
-                    value=ast.Constant(value="Hidden field in Dog"),
-                )
-                node.body.insert(0, new_field)
-
-        elif self.mutation_type == "IPC":  # Change Parent Class
-            if node.name == "Dog":
-                node.bases = [ast.Name(id="object", ctx=ast.Load())]
-
-        elif self.mutation_type == "PCD":  # Constructor Deletion
-            node.body = [n for n in node.body if not isinstance(n, ast.FunctionDef) or n.name != "__init__"]
-
-        elif self.mutation_type == "PCI":  # Constructor Inlining
-            if node.name == "Dog":
-                new_method = ast.FunctionDef(
-                    name="set_info",
-                    args=ast.arguments(
-                        posonlyargs=[], args=[
-                            ast.arg(arg="self", annotation=None),
-                            ast.arg(arg="name", annotation=None),
-                            ast.arg(arg="age", annotation=None),
-                            ast.arg(arg="breed", annotation=None)
-                        ], vararg=None, kwarg=None, kwonlyargs=[], kw_defaults=[], defaults=[]
-                    ),
-                    body=[
-                        ast.Assign(
-                            targets=[ast.Attribute(value=ast.Name(id="self", ctx=ast.Load()), attr="name", ctx=ast.Store())],
-                            value=ast.Name(id="name", ctx=ast.Load()),
-                        ),
-                        ast.Assign(
-                            targets=[ast.Attribute(value=ast.Name(id="self", ctx=ast.Load()), attr="age", ctx=ast.Store())],
-                            value=ast.Name(id="age", ctx=ast.Load()),
-                        ),
-                        ast.Assign(
-                            targets=[ast.Attribute(value=ast.Name(id="self", ctx=ast.Load()), attr="breed", ctx=ast.Store())],
-                            value=ast.Name(id="breed", ctx=ast.Load()),
-                        ),
-                    ],
-                    decorator_list=[],
-                )
-                node.body.append(new_method)
-
-        return self.generic_visit(node)
-
-    def visit_Attribute(self, node):
-        # Handle encapsulation-related mutations
-        if self.mutation_type == "AMC":  # Access Modifier Change
-            if isinstance(node.value, ast.Name) and node.attr == "_age":
-                node.attr = "age"
-        return self.generic_visit(node)
-
-
-# Function to apply a mutation
-def apply_mutation(source_code, mutation_type):
-    # Parse the source code into an AST
-    tree = ast.parse(source_code)
-
-    # Apply the mutation using the transformer
-    transformer = MutationTransformer(mutation_type)
-    mutated_tree = transformer.visit(tree)
-
-    # Return the mutated code as a string
-    return astor.to_source(mutated_tree)
-
-
-# Mutation Testing Script
-def mutate_file(input_file, output_file, mutations):
-    # Read the source code from the input file
     with open(input_file, "r") as f:
         source_code = f.read()
 
-    # Apply each mutation and save the result
-    for mutation in mutations:
-        mutated_code = apply_mutation(source_code, mutation)
-        with open(output_file, "w") as f:
-            f.write(mutated_code)
-        print(f"Mutation '{mutation}' applied and saved to: {output_file}")
-
-
-def run_tests_for_mutations():
-    global survived_count, killed_count
-    survived_count = 0
-    killed_count = 0
-    for mutation in selected_mutations:
-        test_name = mutation_test_map[mutation]
-        print(f"Running test for mutation: {mutation}")
-        test_case = TestAnimalBehavior()
-        try:
-            setup_method = getattr(test_case, "setUp")
-            setup_method()
-            test_method = getattr(test_case, test_name)  # Get the test method by name
-            test_method()  # Call the test method
-            print(f"Test '{test_name}' passed!")
-            survived_count += 1
-        except Exception as e:
-            print(f"Test '{test_name}' failed! Error: {e}")
-            killed_count += 1
-
-def print_mutation_score():
-    # Dictionary of mutations and corresponding test names
-    run_tests_for_mutations()
-    print(f"killed mutations: {killed_count}")
-    print(f"survived mutations: {survived_count}")
-    mutation_score = killed_count / (survived_count + killed_count) * 100
-    print(f"\nFinal Mutation Score: {mutation_score:.2f}%")
-
-
-
-
-
+    # With coverage, each mutant only runs the tests that execute its site;
+    # otherwise it runs the one test mutation_test_map pairs with its operator
+    with phase("parse"):
+        tree = ast.parse(source_code)
+    with phase("index"):
+        build_site_index(source_code)
+    if coverage:
+        with phase("coverage"):
+            test_coverage = collect_coverage(source_code, test_module, module_name)
+
+    # With static, mutants that break a call the tests certainly make (a
+    # constructor or method given the wrong arguments, a method or attribute
+    # that is gone, a super() call with nothing left to reach) are killed
+    # without running them. A kill matrix needs every killer, so it runs them
+    static = static and not kill_matrix
+    if static:
+        with phase("static"):
+            with open(importlib.util.find_spec(test_module).origin, "r") as f:
+                analyzer = StaticAnalyzer(f.read(), tree, module_name)
+
+    # Mutants whose code, site and tests are unchanged since an earlier run
+    # take their result from the cache instead of being retested
+    if cache:
+        result_cache = ResultCache()
+        suite_hash = test_suite_hash(test_module)
+
+    # One mutant per site of every operator, generated only as workers free
+    # up; the mutated AST is compiled in memory by the worker, so nothing is
+    # written to mutant.py
+    mutants = {}
+    pending = {}
+    # Unchanged and duplicate mutants are dropped before execution and left
+    # out of the score
+    deduplicator = MutantDeduplicator(tree)
+
+    # With schema, mutants that only rewrite function bodies are compiled
+    # into one module up front and switched on in turn by the workers; the
+    # rest are still loaded one by one
+    switchable = set()
+    schema_jobs = []
+    if schema:
+        with phase("schema"):
+            schema_tree, switchable = build_schema(tree, iter_mutants(source_code, mutations, shard=shard, tree=tree))
+
+    # skip holds mutants a previous kill matrix found subsumed by another;
+    # leaving them out keeps the same adequacy signal
+    def planned(candidates):
+        for mutant in candidates:
+            if skip and mutant.id in skip:
+                continue
+            with phase("select_tests"):
+                if coverage:
+                    tests = tests_for_site(test_coverage, tree, mutant.site)
+                else:
+                    tests = [mutation_test_map[mutant.site.operator]]
+            publish("generated", mutation=mutant.id, tests=len(tests))
+            yield mutant, tests
+
+    # With schedule, history from earlier runs orders the work: the mutants
+    # expected to take longest go first, so no worker is left with a long
+    # straggler at the end, and each mutant runs its likeliest killer first
+    plan = planned(iter_mutants(source_code, mutations, shard=shard, tree=tree))
+
+    # A sample of `sample` mutants, or as many as fit in `budget` seconds, is
+    # drawn per operator in proportion to its mutants and the score of all of
+    # them is estimated from it. The same seed draws the same sample
+    sampling = sample is not None or budget is not None
+    if sampling:
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        print(f"Sampling mutants with seed {seed}")
+        with phase("sample"):
+            plan = stratified_order(plan, seed)
+            population = {}
+            for mutant, _ in plan:
+                population[mutant.operator] = population.get(mutant.operator, 0) + 1
+            if sample is not None:
+                plan = plan[:sample]
+
+    def scheduled(plan):
+        with phase("schedule"):
+            return sorted(plan, key=lambda item: -history.expected_duration(item[0].site, item[1]))
+
+    if schedule:
+        history = TestHistory()
+        # Under a time budget the sampled order is what keeps a cut-off
+        # sample stratified, so only the tests are reordered
+        if budget is None:
+            plan = scheduled(plan)
+
+    # Every result carries the mutant's position in the unsharded order and
+    # its tree hash, so shard reports can be merged as if run on one node
+    started = time.perf_counter()
+
+    def jobs(plan):
+        for mutant, tests in plan:
+            if budget is not None and time.perf_counter() - started > budget:
+                print(f"Time budget of {budget}s used up, no more mutants are started")
+                break
+            site = mutant.site
+            with phase("patch"):
+                mutated_tree = mutant.tree()
+            with phase("hash"):
+                digest = tree_hash(mutated_tree)
+            identity = {"index": mutant.index, "hash": digest, "order": len(getattr(site, "sites", (site,)))}
+            duplicate = deduplicator.check(site.id, digest)
+            if duplicate == "unchanged":
+                record_result({"mutation": site.id, "status": "unchanged", "killed": False, **identity})
+                continue
+            if duplicate is not None:
+                record_result({"mutation": site.id, "status": "duplicate", "killed": False,
+                               "duplicate_of": duplicate[1], **identity})
+                continue
+            if static:
+                with phase("static"):
+                    verdict = analyzer.check(mutated_tree, tests)
+                if verdict is not None:
+                    test, reason = verdict
+                    record_result({"mutation": site.id, "tests": [test], "test": test, "killed": True,
+                                   "status": "killed", "static": True, "error": f"Statically killed: {reason}",
+                                   "duration": 0.0, **identity}, mutant)
+                    continue
+            if cache:
+                key = result_key(digest, site, suite_hash, tests)
+                with phase("cache"):
+                    # Cached results only know the first killer, not the kill matrix row
+                    result = None if kill_matrix else result_cache.get(key)
+                if result is not None:
+                    result.update(mutation=site.id, tests=[], cached=True, **identity)
+                    record_result(result, mutant)
+                    continue
+                pending[site.id] = key
+            mutants[site.id] = (mutant, identity)
+            if schedule:
+                # The cache key above uses the unordered tests, so reordering never causes a miss
+                tests = history.order_tests(site, tests)
+            if site.id in switchable:
+                schema_jobs.append((site.id, tests, None))
+                continue
+            publish("started", mutation=site.id)
+            yield site.id, tests, mutated_tree
+
+    def record(results):
+        for result in results:
+            mutant, identity = mutants.pop(result["mutation"])
+            result.update(identity)
+            record_result(result, mutant)
+            if schedule:
+                history.record(mutant.site, result)
+            key = pending.pop(result["mutation"], None)
+            # A crashed worker says nothing about the mutant, and a timeout
+            # depends on --timeout and the machine's load, so both are tried
+            # again next time
+            if cache and not result.get("crashed") and result["status"] != "timeout":
+                with phase("cache"):
+                    result_cache.put(key, mutant.site, result)
+
+    publish("campaign_started", target=input_file, total=len(plan) if isinstance(plan, list) else None)
+    try:
+        # Each test gets `timeout` seconds before its worker is killed; the
+        # runner is "pool", "fork" (fork server) or "inprocess"
+        # With kill_matrix every mutant runs all of its tests, not just up to the first killer
+        fail_fast = not kill_matrix
+        record(run_mutants(jobs(plan), runner, workers, timeout, test_module, tree, module_name, fail_fast, profile))
+        if schema_jobs:
+            for job in schema_jobs:
+                publish("started", mutation=job[0])
+            record(run_mutants(schema_jobs, runner, workers, timeout, test_module, schema_tree, module_name,
+                               fail_fast, profile))
+
+        # Higher-order mutants of up to `order` sites are only built from the
+        # first-order mutants that survived, after all of those have run; a
+        # combination with a killed part would be killed by the same test.
+        # Their positions follow the first-order ones
+        if order > 1:
+            survivors = {result["mutation"] for result in mutation_results if result["status"] == "survived"}
+            start = sum(len(build_site_index(source_code)[mutation_type]) for mutation_type in mutations)
+            higher = planned(iter_higher_order(source_code, mutations, order, survivors, tree=tree, start=start))
+            if schedule and budget is None:
+                higher = scheduled(higher)
+            record(run_mutants(jobs(higher), runner, workers, timeout, test_module, tree, module_name, fail_fast,
+                               profile))
+    finally:
+        if cache:
+            with phase("cache"):
+                result_cache.close()
+        if schedule:
+            history.close()
+        phase_profiler.stop()
+    if kill_matrix:
+        tests = list(test_coverage) if coverage else sorted(set(mutation_test_map.values()))
+        mutation_matrix = KillMatrix(tests)
+        for result in mutation_results:
+            if result["status"] in ("killed", "timeout", "survived"):
+                mutation_matrix.add(result["mutation"], result.get("killing_tests") or ())
+    if sampling:
+        first_order = [result for result in mutation_results if result.get("order", 1) == 1]
+        score_estimate = estimate_score(first_order, population, confidence)
+    publish("campaign_finished", **summarize(mutation_results))
+    return Campaign(mutation_results, surviving_mutants, score_estimate, mutation_matrix, phase_profiler)
+
+
+def _print_estimate(estimate, file=None):
+    print(f"Estimated mutation score: {estimate['score']:.2f}% "
+          f"({estimate['confidence'] * 100:g}% CI {estimate['low']:.2f}%-{estimate['high']:.2f}%, "
+          f"{estimate['sampled']} of {estimate['population']} mutants)", file=file)
+    if estimate["unsampled"]:
+        unsampled = ", ".join(f"{operator} ({count})" for operator, count in estimate["unsampled"].items())
+        print(f"The estimate does not cover operators none of whose mutants were sampled: {unsampled}", file=file)
+
+
+def print_mutation_score(mutations=None, input_file="original_code.py", workers=None, coverage=True, cache=True, timeout=10,
+                         runner=DEFAULT_RUNNER, show_survivors=False, sample=None, budget=None, seed=None):
+    campaign = run_tests_for_mutations(mutations, input_file, workers=workers, coverage=coverage, cache=cache,
+                                       timeout=timeout, runner=runner, sample=sample, budget=budget, seed=seed)
+    # With no killed or survived mutant (e.g. no sites) the score is 0
+    summary = summarize(campaign.results)
+    print(f"killed mutations: {summary['killed']}")
+    print(f"survived mutations: {summary['survived']}")
+    if summary["skipped"]:
+        print(f"unchanged or duplicate mutations skipped: {summary['skipped']}")
+    # Source is only rendered for the survivors, and only when asked for
+    if show_survivors:
+        for mutant in campaign.survivors:
+            print(mutant.diff())
+    print(f"\nFinal Mutation Score: {summary['score']:.2f}%")
+    if campaign.estimate is not None:
+        _print_estimate(campaign.estimate)
+
+
+# Non-interactive entry point for scripts and CI: runs the campaign and
+# writes a JSON or JUnit XML report, with a timing for every mutant
+def run_batch(args):
+    stream = open(args.output, "w") if args.output else sys.stdout
+    sinks = []
+    if args.dashboard or args.events or args.events_socket:
+        # The event bus pulls in asyncio, so runs without sinks skip importing it
+        from mutation_events import DashboardSink, JsonLinesSink, SocketSink
+        if args.dashboard:
+            sinks.append(DashboardSink())
+        if args.events:
+            sinks.append(JsonLinesSink(args.events))
+        if args.events_socket:
+            sinks.append(SocketSink(args.events_socket))
+    try:
+        events = None
+        if sinks and not args.merge:
+            from mutation_events import EventBus
+            events = EventBus(sinks)
+    except OSError as e:
+        if stream is not sys.stdout:
+            stream.close()
+        print(f"Cannot start the event sinks: {e}", file=sys.stderr)
+        return 2
+    skip = None
+    if args.dominators:
+        with open(args.dominators, "r") as f:
+            skip = set(KillMatrix.read(f).subsumption()[1])
+    # A shard report records the source it ran on, read before the campaign
+    # starts, so merging refuses shards of different versions of the target
+    target_hash = None
+    if args.shard is not None and not args.merge:
+        with open(args.target, "r") as f:
+            target_hash = source_hash(f.read())
+    try:
+        # Progress lines go to stderr so the report can be piped; the
+        # dashboard replaces them
+        with contextlib.redirect_stdout(open(os.devnull, "w") if args.dashboard else sys.stderr):
+            campaign = None
+            if args.merge:
+                try:
+                    results = merge_results(args.merge)
+                except ValueError as e:
+                    print(f"Cannot merge the reports: {e}", file=sys.stderr)
+                    return 2
+            else:
+                try:
+                    campaign = run_tests_for_mutations(
+                        args.operators, args.target, workers=args.workers, coverage=args.coverage, cache=args.cache,
+                        timeout=args.timeout, runner=args.runner, test_module=args.tests, module_name=args.module_name,
+                        shard=args.shard, profile=args.profile is not None, schema=args.schema,
+                        schedule=args.schedule, sample=args.sample, budget=args.budget, seed=args.seed,
+                        confidence=args.confidence, events=events, order=args.order,
+                        kill_matrix=args.kill_matrix is not None, skip=skip, static=args.static)
+                finally:
+                    if events is not None:
+                        events.close()
+                results = campaign.results
+        estimate = campaign.estimate if campaign else None
+        if campaign and campaign.matrix is not None:
+            with open(args.kill_matrix, "w") as f:
+                campaign.matrix.write(f)
+            dominators, subsumed, unkilled = campaign.matrix.subsumption()
+            print(f"Kill matrix: {len(dominators)} dominator mutants subsume {len(subsumed)} others, "
+                  f"{len(unkilled)} not killed", file=sys.stderr)
+        scope = "dominators" if skip is not None and not args.merge else None
+        report_writers[args.format](results, stream, args.target, args.tests, estimate, scope,
+                                    args.shard if campaign else None, operators=args.operators,
+                                    source_hash=target_hash)
+        if args.profile and campaign:
+            with open(args.profile, "w") as f:
+                json.dump(profile_report(campaign.profiler, results, args.profile_top), f, indent=2)
+        if args.profile_dump and not args.merge:
+            with open(args.target, "r") as f:
+                source_code = f.read()
+            with contextlib.redirect_stdout(sys.stderr):
+                dump_profiles(source_code, results, args.profile_dump, args.profile_top, args.tests, args.module_name)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+    summary = summarize(results)
+    print(f"killed mutations: {summary['killed']}", file=sys.stderr)
+    print(f"survived mutations: {summary['survived']}", file=sys.stderr)
+    if skip is not None and not args.merge:
+        # Subsumed mutants are the easy kills, so this score runs lower than a full one
+        print(f"\nFinal Mutation Score over dominator mutants only ({len(skip)} subsumed mutants skipped): "
+              f"{summary['score']:.2f}%", file=sys.stderr)
+    else:
+        print(f"\nFinal Mutation Score: {summary['score']:.2f}%", file=sys.stderr)
+    for order, counts in summary.get("higher_order", {}).items():
+        print(f"Order {order} mutants (not in the score): killed {counts['killed']}, survived {counts['survived']}, "
+              f"score {counts['score']:.2f}%", file=sys.stderr)
+    score = summary["score"]
+    if estimate is not None:
+        _print_estimate(estimate, sys.stderr)
+        score = estimate["score"]
+    if args.min_score is not None and score < args.min_score:
+        return 1
+    return 0
+
+
+def _operator_list(value):
+    operators = value.split(",")
+    unknown = [operator for operator in operators if operator not in mutation_operators]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown operator(s) {', '.join(unknown)}; "
+                                         f"choose from {', '.join(mutation_operators)}")
+    return operators
+
+
+def _confidence(value):
+    confidence = float(value)
+    if not 0 < confidence < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not between 0 and 1")
+    return confidence
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Mutation testing for object-oriented Python code")
+    parser.add_argument("--target", default="original_code.py", help="source file or package directory to mutate")
+    parser.add_argument("--tests", default="mutation_test", help="test module to run against each mutant")
+    parser.add_argument("--module-name", default="mutant", help="name the test module imports the target as")
+    parser.add_argument("--operators", type=_operator_list, default=list(mutation_operators),
+                        help=f"comma separated operators out of {','.join(mutation_operators)}, default all")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, default one per core")
+    parser.add_argument("--runner", choices=sorted(mutant_runners), default=None,
+                        help=f"how mutants are run, default {DEFAULT_RUNNER}")
+    parser.add_argument("--timeout", type=float, default=10, help="seconds allowed per test")
+    parser.add_argument("--no-coverage", dest="coverage", action="store_false",
+                        help="run the mutation_test_map test instead of the covering tests")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="ignore cached results")
+    parser.add_argument("--format", choices=sorted(report_writers), default="json")
+    parser.add_argument("--output", help="report file, default stdout")
+    parser.add_argument("--schema", action="store_true",
+                        help="run mutants that only change function bodies from one mutant schema module, "
+                             "with --runner fork")
+    parser.add_argument("--no-static", dest="static", action="store_false",
+                        help="run every mutant instead of killing those that break a call the tests make unseen "
+                             "(single-file targets only)")
+    parser.add_argument("--no-schedule", dest="schedule", action="store_false",
+                        help="run mutants and tests in generation order instead of by their history")
+    parser.add_argument("--sample", type=int, default=None,
+                        help="run a stratified random sample of this many mutants and estimate the score")
+    parser.add_argument("--budget", type=float, default=None,
+                        help="start sampled mutants for at most this many seconds and estimate the score")
+    parser.add_argument("--seed", type=int, default=None, help="random seed of the sample, printed when not given")
+    parser.add_argument("--confidence", type=_confidence, default=0.95,
+                        help="confidence level of the estimated score, between 0 and 1")
+    parser.add_argument("--order", type=int, default=1,
+                        help="also run higher-order mutants combining up to this many surviving first-order mutants")
+    parser.add_argument("--kill-matrix", metavar="FILE",
+                        help="run every selected test against every mutant and write the kill matrix and the "
+                             "dominator mutants as JSON")
+    parser.add_argument("--dominators", metavar="FILE",
+                        help="skip the mutants a kill matrix written by --kill-matrix found subsumed")
+    parser.add_argument("--dashboard", action="store_true", help="show a live progress line instead of per-mutant lines")
+    parser.add_argument("--events", metavar="FILE", help="write mutant events as JSON lines")
+    parser.add_argument("--events-socket", metavar="PATH", help="serve mutant events as JSON lines on a Unix socket")
+    parser.add_argument("--shard", type=parse_shard, default=None,
+                        help="run only slice i of N of the mutants, as i/N")
+    parser.add_argument("--merge", nargs="+", metavar="REPORT",
+                        help="merge JSON reports written by --shard runs instead of running mutants")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="write wall time, CPU time and peak memory per phase and per mutant as JSON")
+    parser.add_argument("--profile-dump", metavar="DIR", help="write cProfile .prof files for the slowest mutants")
+    parser.add_argument("--profile-top", type=int, default=5, help="how many of the slowest mutants to report")
+    parser.add_argument("--min-score", type=float, default=None, help="exit with status 1 below this score")
+    parser.add_argument("--watch", action="store_true",
+                        help="stay running and re-run the mutants affected by each save of the target or tests")
+    parser.add_argument("--interactive", action="store_true", help="choose operators from a console menu")
+    args = parser.parse_args(argv)
+    # With fork, watching forks every mutant from the long-lived process,
+    # which keeps the target and tests imported between saves
+    args.runner = args.runner or DEFAULT_RUNNER
+    if args.order > 1 and args.shard is not None:
+        parser.error("--order cannot be combined with --shard")
+    if args.schema and args.runner != "fork":
+        parser.error("--schema needs --runner fork")
+    # A package directory runs coverage, dedup and the runners only; the
+    # single-file extras would be dropped, so they are refused instead
+    if os.path.isdir(args.target) and not args.merge:
+        single_file = {"--shard": args.shard is not None, "--sample": args.sample is not None,
+                       "--budget": args.budget is not None, "--order": args.order > 1, "--schema": args.schema,
+                       "--kill-matrix": args.kill_matrix is not None, "--dominators": args.dominators is not None,
+                       "--profile-dump": args.profile_dump is not None, "--watch": args.watch}
+        refused = [flag for flag, given in single_file.items() if given]
+        if refused:
+            parser.error(f"{', '.join(refused)} cannot be used with a package directory --target")
+    return args
+
+
+# Console menu entry point; consolemenu is only imported here
+def run_interactive():
+    from consolemenu import ConsoleMenu
+    from consolemenu.items import FunctionItem
 
-# Example Usage
-if __name__ == "__main__":
     # Path to the original source file
     input_file = "original_code.py"  # Replace with your file
-    # Directory to save mutated files
-    output_file = "mutant.py"
-    os.makedirs("mutants", exist_ok=True)
-
-    # List of mutations to apply
-    mutations = ["AMC", "IHI", "IHD", "IOD", "ISI", "IPC", "PMD", "PPD", "PCI", "PCD", "OMD", "OAC"]
 
     # Perform the mutation testing
     selected_mutations = []
 
 
+    # Selecting only picks the operators; their mutants are built in memory
+    # when the campaign runs, nothing is written to disk
     def handle_selection(selected_item):
-        selected_mutations.append(selected_item)
-        menu.subtitle = f"{selected_item} is selected!"
-        if(len(selected_mutations) <= 1):
-            mutate_file(input_file , output_file , selected_mutations)
-        else:
-            mutate_file(output_file , output_file , selected_mutations)
+        if selected_item not in selected_mutations:
+            selected_mutations.append(selected_item)
+        menu.subtitle = f"Selected: {', '.join(selected_mutations)}"
 
 
     menu = ConsoleMenu("Mutation", "Choose mutations")
@@ -262,4 +574,18 @@ if __name__ == "__main__":
     # Finally, we call show to show the menu and allow the user to interact
     menu.show()
 
-    print_mutation_score()
+    print_mutation_score(selected_mutations, input_file)
+
+
+# Example Usage
+if __name__ == "__main__":
+    # With no arguments the console menu is shown, as before
+    if len(sys.argv) == 1 or "--interactive" in sys.argv:
+        run_interactive()
+    else:
+        args = parse_args()
+        if args.watch:
+            MutationDaemon(args.target, args.operators, args.tests, args.module_name, args.runner, args.workers,
+                           args.timeout).watch()
+        else:
+            sys.exit(run_batch(args))
@@ -0,0 +1,223 @@
+import ast
+import difflib
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+import astor
+
+from mutation_operators import MutationSite, MutationTransformer, mutation_operators, node_at, patch_tree
+
+
+# Bump when the operators change which sites they find or how they label
+# them, so stale indexes written by an older version are not reused
+INDEX_VERSION = 2
+
+_site_indexes = {}
+
+
+def source_hash(source_code):
+    return hashlib.sha256(source_code.encode("utf-8")).hexdigest()
+
+
+def _site_to_json(site):
+    return [site.operator, [[list(step) for step in path] for path in site.paths], site.label, site.lineno, site.arg]
+
+
+def _site_from_json(data):
+    operator, paths, label, lineno, arg = data
+    paths = tuple(tuple(tuple(step) for step in path) for path in paths)
+    if isinstance(arg, list):
+        arg = tuple(tuple(item) if isinstance(item, list) else item for item in arg)
+    return MutationSite(operator, paths, label, lineno, arg)
+
+
+# Every mutation site of every operator in the source, as {operator: [sites]}.
+# Indexes are cached by a hash of the source, in memory and under cache_dir.
+# class_view replaces the module's own class table (see class_table), e.g.
+# with one that also holds the classes of the rest of a package
+def build_site_index(source_code, cache_dir=".mutation_cache", class_view=None):
+    key = f"{INDEX_VERSION}-{source_hash(source_code)}"
+    if class_view is not None:
+        key += "-" + source_hash(json.dumps(class_view, sort_keys=True))[:16]
+    if key in _site_indexes:
+        return _site_indexes[key]
+
+    cache_file = os.path.join(cache_dir, f"sites-{key}.json") if cache_dir else None
+    if cache_file and os.path.exists(cache_file):
+        with open(cache_file, "r") as f:
+            index = {operator: [_site_from_json(site) for site in sites] for operator, sites in json.load(f).items()}
+    else:
+        index = {operator: [] for operator in mutation_operators}
+        for site in MutationTransformer(list(mutation_operators), class_view).collect_sites(ast.parse(source_code)):
+            index[site.operator].append(site)
+        if cache_file:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_file, "w") as f:
+                json.dump({operator: [_site_to_json(site) for site in sites] for operator, sites in index.items()}, f)
+
+    _site_indexes[key] = index
+    return index
+
+
+# A lightweight handle on one mutant: the site plus a reference to the
+# shared original tree. The mutated tree, and its source text, are only
+# built when asked for, so a campaign never holds more than it is using
+class Mutant:
+    __slots__ = ("site", "original", "index")
+
+    def __init__(self, site, original, index=None):
+        self.site = site
+        self.original = original
+        # Position in the full, unsharded generation order
+        self.index = index
+
+    @property
+    def id(self):
+        return self.site.id
+
+    @property
+    def operator(self):
+        return self.site.operator
+
+    def tree(self):
+        return patch_tree(self.original, [self.site])
+
+    # The mutated node at each of the site's paths, or None where it was deleted
+    def nodes(self):
+        tree = self.tree()
+        nodes = []
+        for path in self.site.paths:
+            try:
+                nodes.append(node_at(tree, path))
+            except (AttributeError, IndexError):
+                nodes.append(None)
+        return nodes
+
+    def source(self):
+        return astor.to_source(self.tree())
+
+    # Indexes of the top-level statements (classes, functions) the site touches
+    def statements(self):
+        return sorted({path[0][1] for path in self.site.paths if path and path[0][0] == "body"})
+
+    # Unified diff of only the top-level statements the mutant changes, so
+    # reporting a survivor does not render the whole module. Falls back to the
+    # whole module when the mutation adds or removes top-level statements
+    def diff(self):
+        tree = self.tree()
+        statements = self.statements()
+        if len(tree.body) != len(self.original.body) or not statements:
+            pairs = [(self.original, tree, 1)]
+        else:
+            pairs = [(self.original.body[index], tree.body[index], self.original.body[index].lineno)
+                     for index in statements]
+        chunks = []
+        for before, after, lineno in pairs:
+            chunks.append("".join(difflib.unified_diff(astor.to_source(before).splitlines(keepends=True),
+                                                       astor.to_source(after).splitlines(keepends=True),
+                                                       f"original:{lineno}", self.id)))
+        return "".join(chunks)
+
+
+# The sites of a higher-order mutant taken together. It stands in for a
+# MutationSite wherever a campaign only needs the id, operator and paths;
+# the id joins the first-order ids with "+"
+class SiteCombination(namedtuple("SiteCombination", ["sites"])):
+    __slots__ = ()
+
+    @property
+    def id(self):
+        return "+".join(site.id for site in self.sites)
+
+    @property
+    def operator(self):
+        return "+".join(site.operator for site in self.sites)
+
+    @property
+    def label(self):
+        return "+".join(site.label for site in self.sites)
+
+    @property
+    def lineno(self):
+        return min((site.lineno for site in self.sites if site.lineno is not None), default=None)
+
+    @property
+    def paths(self):
+        return tuple(path for site in self.sites for path in site.paths)
+
+
+# A mutant with several sites applied to one copy of the shared tree
+class HigherOrderMutant(Mutant):
+    __slots__ = ()
+
+    def tree(self):
+        return patch_tree(self.original, self.site.sites)
+
+
+# Two sites conflict when one touches a node inside (or at) a node the other
+# touches, e.g. PCD deleting the __init__ whose parameter PPD deletes; their
+# mutations cannot be applied independently
+def sites_conflict(first, second):
+    return any(path[:len(other)] == other or other[:len(path)] == path
+               for path in first.paths for other in second.paths)
+
+
+# Lazily yield the higher-order mutants of 2 to `order` first-order sites of
+# the enabled operators, built on one parse. Only sites whose ids are in
+# `include` take part (a campaign passes its surviving first-order mutants,
+# as combinations of killed ones are killed by the same tests), and a site
+# is never combined with one it conflicts with, which prunes every larger
+# combination containing the pair. Positions continue from `start`
+def iter_higher_order(source_code, mutation_types, order, include=None, cache_dir=".mutation_cache", tree=None,
+                      start=0):
+    if tree is None:
+        tree = ast.parse(source_code)
+    index = build_site_index(source_code, cache_dir)
+    sites = [site for mutation_type in mutation_types for site in index[mutation_type]
+             if include is None or site.id in include]
+    compatible = [{later for later in range(current + 1, len(sites)) if not sites_conflict(sites[current], sites[later])}
+                  for current in range(len(sites))]
+    position = start
+
+    def extend(combination, candidates):
+        nonlocal position
+        if len(combination) > 1:
+            yield HigherOrderMutant(SiteCombination(tuple(sites[member] for member in combination)), tree, position)
+            position += 1
+        if len(combination) == order:
+            return
+        for candidate in candidates:
+            yield from extend(combination + [candidate], sorted(compatible[candidate].intersection(candidates)))
+
+    yield from extend([], list(range(len(sites))))
+
+
+# Parse a "--shard i/N" value into (i, N), with i counted from 1
+def parse_shard(value):
+    index, count = (int(part) for part in value.split("/"))
+    if not 1 <= index <= count:
+        raise ValueError(f"shard {value!r} is not between 1/{count} and {count}/{count}")
+    return index, count
+
+
+# The shard (1..count) a site belongs to. The hash ignores line numbers, so
+# a site stays on its shard when unrelated edits move code around
+def shard_of(site, count):
+    digest = hashlib.sha256(f"{site.operator}:{site.label}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+# Parse once and lazily yield a Mutant per site of every enabled operator.
+# With shard=(i, N) only the sites of the i-th of N disjoint slices are yielded
+def iter_mutants(source_code, mutation_types, cache_dir=".mutation_cache", shard=None, tree=None, class_view=None):
+    if tree is None:
+        tree = ast.parse(source_code)
+    index = build_site_index(source_code, cache_dir, class_view)
+    position = 0
+    for mutation_type in mutation_types:
+        for site in index[mutation_type]:
+            if shard is None or shard_of(site, shard[1]) == shard[0]:
+                yield Mutant(site, tree, position)
+            position += 1
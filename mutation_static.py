@@ -0,0 +1,459 @@
+import ast
+
+from mutant_loader import bound_names
+
+
+# Statements that always run once reached; scanning a body stops at the
+# first statement that may branch, loop, return early or catch an error
+_STRAIGHT = (ast.Expr, ast.Assign, ast.AnnAssign, ast.AugAssign, ast.Assert, ast.Pass)
+
+
+def _straight_line(function):
+    statements = []
+    for statement in function.body:
+        if not isinstance(statement, _STRAIGHT):
+            break
+        statements.append(statement)
+    return statements
+
+
+# Sub-expressions that are certainly evaluated: not the branches of `and`,
+# `or` and conditional expressions, nor lambda and comprehension bodies
+def _evaluated(node):
+    if isinstance(node, (ast.Lambda, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+        return
+    if isinstance(node, ast.BoolOp):
+        yield from _evaluated(node.values[0])
+        return
+    if isinstance(node, ast.IfExp):
+        yield from _evaluated(node.test)
+        return
+    for child in ast.iter_child_nodes(node):
+        yield from _evaluated(child)
+    yield node
+
+
+# The calls and attribute reads a statement certainly evaluates, in order
+def _checked_nodes(statement):
+    return [node for node in _evaluated(statement)
+            if isinstance(node, ast.Call) or (isinstance(node, ast.Attribute) and isinstance(node.ctx, ast.Load))]
+
+
+# Nodes of a function's own body, not of the functions and classes nested in it
+def _own_nodes(function):
+    pending = list(function.body)
+    while pending:
+        node = pending.pop()
+        yield node
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)):
+            pending.extend(ast.iter_child_nodes(node))
+
+
+# Names local to a function: its parameters and every name it assigns. They
+# are local for the whole body, so a class of the same name is hidden
+def _local_names(function):
+    arguments = function.args
+    names = {arg.arg for arg in arguments.posonlyargs + arguments.args + arguments.kwonlyargs}
+    names.update(arg.arg for arg in (arguments.vararg, arguments.kwarg) if arg is not None)
+    names.update(node.id for node in _own_nodes(function) if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store))
+    return frozenset(names)
+
+
+def _plain(function):
+    # Decorated functions (properties, static and class methods) have no arity we can trust
+    return isinstance(function, ast.FunctionDef) and not function.decorator_list
+
+
+def _generator(function):
+    # Calling a generator function only builds the generator; its body runs later, if at all
+    return any(isinstance(node, (ast.Yield, ast.YieldFrom)) for node in _own_nodes(function))
+
+
+def _self_attribute(node):
+    return isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "self"
+
+
+# Why calling `function` with a call's arguments raises TypeError, or None
+def _arity_error(function, call, bound, display):
+    if any(isinstance(arg, ast.Starred) for arg in call.args) or any(keyword.arg is None for keyword in call.keywords):
+        return None
+    arguments = function.args
+    params = [arg.arg for arg in arguments.posonlyargs + arguments.args][1 if bound else 0:]
+    required = len(params) - len(arguments.defaults)
+    given = len(call.args)
+    if given > len(params) and arguments.vararg is None:
+        return f"{display}() takes {len(params) + bound} positional arguments but {given + bound} were given"
+    filled = set(params[:given])
+    keyword_only = [arg.arg for arg in arguments.kwonlyargs]
+    for keyword in call.keywords:
+        if keyword.arg in filled:
+            return f"{display}() got multiple values for argument '{keyword.arg}'"
+        if keyword.arg not in params and keyword.arg not in keyword_only and arguments.kwarg is None:
+            return f"{display}() got an unexpected keyword argument '{keyword.arg}'"
+        filled.add(keyword.arg)
+    missing = [name for name in params[:required] if name not in filled]
+    missing += [arg.arg for arg, default in zip(arguments.kwonlyargs, arguments.kw_defaults)
+                if default is None and arg.arg not in filled]
+    if missing:
+        return f"{display}() missing {len(missing)} required argument(s): {', '.join(missing)}"
+    return None
+
+
+# (methods, class attributes, attributes stored on anything) of a top-level statement
+def _summary(statement):
+    methods, attributes = {}, set()
+    if isinstance(statement, ast.ClassDef):
+        for item in statement.body:
+            if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                methods[item.name] = item
+            elif isinstance(item, ast.Assign):
+                attributes.update(target.id for target in item.targets if isinstance(target, ast.Name))
+            elif isinstance(item, ast.AnnAssign) and isinstance(item.target, ast.Name):
+                attributes.add(item.target.id)
+    stored = {node.attr for node in ast.walk(statement) if isinstance(node, ast.Attribute) and isinstance(node.ctx, ast.Store)}
+    return methods, attributes, stored
+
+
+# The classes of a (mutated) module: their bases, methods, class attributes,
+# and every attribute the module or the tests store on an object. A name
+# bound more than once at the top level is not taken for a class. memo is
+# StaticAnalyzer._memo, so statements a mutant did not touch are not
+# summarised again
+class _ClassTable:
+    def __init__(self, tree, memo, test_fields=frozenset()):
+        classes, bindings = {}, {}
+        for statement in tree.body:
+            if isinstance(statement, ast.ClassDef):
+                classes[statement.name] = statement
+            for name in memo(bound_names, statement):
+                bindings[name] = bindings.get(name, 0) + 1
+        self.classes = {name: node for name, node in classes.items() if bindings[name] == 1}
+        self.members = {name: memo(_summary, node)[:2] for name, node in self.classes.items()}
+        self.fields = set(test_fields).union(*(memo(_summary, statement)[2] for statement in tree.body))
+        self._mro = {}
+        self._lookups = {}
+
+    # C3 linearisation, or None when a base is not a class of this module
+    def mro(self, name):
+        if name not in self._mro:
+            self._mro[name] = None  # A class among its own bases has no MRO
+            self._mro[name] = self._linearise(name)
+        return self._mro[name]
+
+    def _linearise(self, name):
+        if name == "object":
+            return []
+        node = self.classes.get(name)
+        if node is None or node.keywords:
+            return None
+        bases = []
+        for base in node.bases:
+            if not isinstance(base, ast.Name):
+                return None
+            bases.append(base.id)
+        sequences = []
+        for base in bases:
+            order = self.mro(base)
+            if order is None:
+                return None
+            sequences.append(list(order))
+        sequences.append([base for base in bases if base != "object"])
+        merged = [name]
+        while any(sequences):
+            for sequence in sequences:
+                if sequence and not any(sequence[0] in other[1:] for other in sequences):
+                    head = sequence[0]
+                    break
+            else:
+                return None
+            merged.append(head)
+            sequences = [[item for item in sequence if item != head] for sequence in sequences]
+        return merged
+
+    # (owner class, FunctionDef) for attr on an instance of `name`, searching
+    # the MRO after `after` when given (super()); "unknown" when it may exist
+    # in a way we cannot see, None when it certainly does not exist
+    def lookup(self, name, attr, after=None):
+        key = (name, attr, after)
+        if key not in self._lookups:
+            self._lookups[key] = self._lookup(name, attr, after)
+        return self._lookups[key]
+
+    def _lookup(self, name, attr, after):
+        order = self.mro(name)
+        if order is None:
+            return "unknown"
+        if after is not None:
+            if after not in order:
+                return "unknown"
+            order = order[order.index(after) + 1:]
+        for owner in order:
+            methods, attributes = self.members[owner]
+            if "__getattr__" in methods or "__getattribute__" in methods:
+                return "unknown"
+            if attr in methods:
+                return owner, methods[attr]
+            if attr in attributes:
+                return "unknown"
+        # object supplies the other special methods; __init__ and __new__
+        # falling through to object's is what the callers check for
+        if attr in self.fields or (attr.startswith("__") and attr not in ("__init__", "__new__")):
+            return "unknown"
+        return None
+
+
+# Finds mutants that certainly fail a test without running it: a straight-line
+# statement of the test (or its setUp) calls a constructor or method with the
+# wrong number of arguments, uses a method or attribute that no longer exists,
+# or reaches a super() call that no longer resolves. Constructors and methods
+# reached this way are followed into their own straight-line bodies. Only
+# classes the test module imports from module_name are recognised, and a
+# test the analysis already flags on the unmutated module is never trusted
+class StaticAnalyzer:
+    def __init__(self, test_source, original_tree, module_name="mutant", depth=4):
+        self.depth = depth
+        self.test_tree = ast.parse(test_source)
+        self.test_fields = {node.attr for node in ast.walk(self.test_tree)
+                            if isinstance(node, ast.Attribute) and isinstance(node.ctx, ast.Store)}
+        self.test_classes = {node.name: node for node in self.test_tree.body if isinstance(node, ast.ClassDef)}
+        # Methods of the test classes: calling one of them may rebind self's attributes
+        self.helpers = {item.name for node in self.test_classes.values() for item in node.body
+                        if isinstance(item, ast.FunctionDef)}
+        self._imports(module_name)
+        # What is worked out about a node of the original tree or the tests is
+        # kept: mutants share every node they did not change with the
+        # original tree, so only the changed ones are looked at again
+        self.stable = {id(node): node for tree in (original_tree, self.test_tree) for node in ast.walk(tree)}
+        self.memo = {}
+        self.scratch = {}
+        original = _ClassTable(original_tree, self._memo, self.test_fields)
+        self.untrusted = {test for test in self._all_tests() if self._test_error(original, test) is not None}
+
+    # Which names of the test module are classes of the module under test:
+    # {local name: class name}, and whether it star-imports the module
+    def _imports(self, module_name):
+        self.imported, self.star = {}, False
+        rebound = set()
+        for statement in self.test_tree.body:
+            if isinstance(statement, ast.ImportFrom) and statement.module == module_name and not statement.level:
+                for alias in statement.names:
+                    if alias.name == "*":
+                        self.star = True
+                    else:
+                        self.imported[alias.asname or alias.name] = alias.name
+            elif isinstance(statement, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                rebound.add(statement.name)
+            elif isinstance(statement, (ast.Import, ast.ImportFrom)):
+                rebound.update((alias.asname or alias.name).split(".")[0] for alias in statement.names)
+            else:
+                rebound.update(node.id for node in ast.walk(statement)
+                               if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store))
+        self.rebound = rebound - set(self.imported)
+
+    def _all_tests(self):
+        for class_name, node in self.test_classes.items():
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef) and item.name.startswith("test"):
+                    yield f"{class_name}.{item.name}"
+
+    # "Class.test_method" for a test id, which may be a bare method name
+    def _qualified(self, test):
+        if "." in test:
+            return test
+        for class_name, node in self.test_classes.items():
+            if any(getattr(item, "name", None) == test for item in node.body):
+                return f"{class_name}.{test}"
+        return test
+
+    # (setUp, test method) of a test id, or None when it is not in the module
+    def _resolve(self, test):
+        class_name, _, method_name = self._qualified(test).rpartition(".")
+        node = self.test_classes.get(class_name)
+        if node is None:
+            return None
+        methods = {item.name: item for item in node.body if isinstance(item, ast.FunctionDef)}
+        return methods.get("setUp"), methods.get(method_name)
+
+    # (test, reason) for the first of the tests the mutated module certainly
+    # fails, or None
+    def check(self, mutated_tree, tests):
+        try:
+            table = _ClassTable(mutated_tree, self._memo, self.test_fields)
+            for test in tests:
+                if self._qualified(test) in self.untrusted:
+                    continue
+                reason = self._test_error(table, test)
+                if reason is not None:
+                    return test, reason
+            return None
+        finally:
+            self.scratch = {}
+
+    # compute(node), kept for the nodes of the original tree and the tests,
+    # and for the other nodes of the mutant being checked until it is done
+    def _memo(self, compute, node):
+        memo = self.memo if self.stable.get(id(node)) is node else self.scratch
+        key = (compute.__name__, id(node))
+        if key not in memo:
+            memo[key] = compute(node)
+        return memo[key]
+
+    # Local names of a function, with no known class yet
+    def _locals(self, function):
+        return dict.fromkeys(self._memo(_local_names, function))
+
+    def _test_error(self, table, test):
+        resolved = self._resolve(test)
+        if resolved is None or resolved[1] is None:
+            return None
+        setup, method = resolved
+        self_types = {}
+        for body in ([setup] if setup is not None else []) + [method]:
+            local_types = self._locals(body)
+            for statement in self._memo(_straight_line, body):
+                reason = self._statement_error(table, statement, local_types, self_types, None, ())
+                if reason is not None:
+                    return reason
+                self._record_types(table, statement, local_types, self_types)
+        return None
+
+    # (names, self attributes) a test statement rebinds, and whether it may
+    # rebind any self attribute: it calls a test helper or passes self on
+    def _rebinds(self, statement):
+        names, attributes, anything = set(), set(), False
+        for node in ast.walk(statement):
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+                names.add(node.id)
+            elif _self_attribute(node) and isinstance(node.ctx, ast.Store):
+                attributes.add(node.attr)
+            elif isinstance(node, ast.Call):
+                anything = anything or (_self_attribute(node.func) and node.func.attr in self.helpers) \
+                    or any(isinstance(arg, ast.Name) and arg.id == "self" for arg in node.args)
+        return names, attributes, anything
+
+    # Forget the class of every name and self attribute a statement rebinds,
+    # then remember it for a plain `name = Class(...)` or `self.name = Class(...)`
+    def _record_types(self, table, statement, local_types, self_types):
+        kind = None
+        if isinstance(statement, ast.Assign) and len(statement.targets) == 1:
+            kind = self._type_of(table, statement.value, local_types, self_types)
+        names, attributes, anything = self._memo(self._rebinds, statement)
+        local_types.update(dict.fromkeys(names))
+        if anything:
+            self_types.clear()
+        for attribute in attributes:
+            self_types.pop(attribute, None)
+        if kind is not None:
+            target = statement.targets[0]
+            if isinstance(target, ast.Name):
+                local_types[target.id] = kind
+            elif _self_attribute(target):
+                self_types[target.attr] = kind
+
+    # The class of the module a name refers to, or None. In the test module
+    # that is a class imported from the module under test; in a method of
+    # the module, any class of it the method's locals do not hide
+    def _class_named(self, table, name, local_types, context):
+        if name in local_types:
+            return None
+        if context is None:
+            if name in self.imported:
+                name = self.imported[name]
+            elif not self.star or name.startswith("_") or name in self.rebound:
+                return None
+        return name if name in table.classes else None
+
+    # The class of the instance an expression certainly evaluates to, or None
+    def _type_of(self, table, node, local_types, self_types, context=None):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            return self._class_named(table, node.func.id, local_types, context)
+        if isinstance(node, ast.Name):
+            if node.id == "self" and context is not None and "self" not in local_types:
+                return context[0]
+            return local_types.get(node.id)
+        if _self_attribute(node) and context is None:
+            return self_types.get(node.attr)
+        return None
+
+    # context is (self class, defining class) inside a method of the module
+    def _statement_error(self, table, statement, local_types, self_types, context, stack):
+        for node in self._memo(_checked_nodes, statement):
+            reason = None
+            if isinstance(node, ast.Call):
+                reason = self._call_error(table, node, local_types, self_types, context, stack)
+            else:
+                kind = self._type_of(table, node.value, local_types, self_types, context)
+                if kind is not None and table.lookup(kind, node.attr) is None:
+                    reason = f"'{kind}' object has no attribute '{node.attr}'"
+            if reason is not None:
+                return reason
+        return None
+
+    def _call_error(self, table, call, local_types, self_types, context, stack):
+        func = call.func
+        if isinstance(func, ast.Name):
+            name = self._class_named(table, func.id, local_types, context)
+            if name is None:
+                return None
+            found = table.lookup(name, "__init__")
+            if found == "unknown":
+                return None
+            if found is None:
+                if table.lookup(name, "__new__") is None and (call.args or call.keywords):
+                    return f"{name}() takes no arguments"
+                return None
+            return self._enter(table, found, call, name, f"{found[0]}.__init__", stack)
+
+        if not isinstance(func, ast.Attribute):
+            return None
+        if isinstance(func.value, ast.Call) and isinstance(func.value.func, ast.Name) \
+                and func.value.func.id == "super" and not func.value.args and context is not None \
+                and "super" not in local_types:
+            self_class, defining = context
+            found = table.lookup(self_class, func.attr, after=defining)
+            if found == "unknown":
+                return None
+            if found is None:
+                if func.attr == "__init__":
+                    if call.args or call.keywords:
+                        return "object.__init__() takes exactly one argument (the instance to initialize)"
+                    return None
+                return f"'super' object has no attribute '{func.attr}'"
+            return self._enter(table, found, call, self_class, f"{found[0]}.{func.attr}", stack)
+
+        kind = self._type_of(table, func.value, local_types, self_types, context)
+        if kind is None:
+            return None
+        found = table.lookup(kind, func.attr)
+        if found == "unknown":
+            return None
+        if found is None:
+            return f"'{kind}' object has no attribute '{func.attr}'"
+        return self._enter(table, found, call, kind, f"{found[0]}.{func.attr}", stack)
+
+    # Check the arguments of a call to a method, then follow it into the
+    # method's straight-line body with self bound to an instance of self_class
+    def _enter(self, table, found, call, self_class, display, stack):
+        owner, function = found
+        if not _plain(function):
+            return None
+        reason = _arity_error(function, call, True, display)
+        if reason is not None or self._memo(_generator, function) or len(stack) >= self.depth \
+                or (owner, function.name) in stack:
+            return reason
+        stack = stack + ((owner, function.name),)
+        # The tests of a mutant mostly construct the same classes in setUp
+        key = ("body", id(function), self_class, stack)
+        if key not in self.scratch:
+            self.scratch[key] = self._body_error(table, function, self_class, owner, stack)
+        return self.scratch[key]
+
+    def _body_error(self, table, function, self_class, owner, stack):
+        local_types = self._locals(function)
+        if function.args.args[:1] and function.args.args[0].arg == "self":
+            local_types.pop("self")
+        for statement in self._memo(_straight_line, function):
+            reason = self._statement_error(table, statement, local_types, {}, (self_class, owner), stack)
+            if reason is not None:
+                return reason
+        return None
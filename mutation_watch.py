@@ -0,0 +1,276 @@
+import ast
+import importlib
+import importlib.util
+import os
+import sys
+import time
+
+from mutation_cache import tree_hash
+from mutation_coverage import collect_coverage, tests_for_site
+from mutation_engine import DEFAULT_RUNNER, run_mutants
+from mutation_operators import class_table, node_at
+from mutation_report import summarize
+from mutation_sites import iter_mutants
+
+
+def _dump(node):
+    return ast.dump(node, include_attributes=False)
+
+
+# {qualified name: dump} of the classes, functions and methods of a module.
+# A class is dumped without its methods, so editing a method only changes
+# that method's entry; every other top-level statement goes under "<module>"
+def definitions(tree):
+    found = {}
+    module = []
+    for statement in tree.body:
+        if isinstance(statement, ast.ClassDef):
+            methods = [item for item in statement.body if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))]
+            header = ast.ClassDef(name=statement.name, bases=statement.bases, keywords=statement.keywords,
+                                  body=[item for item in statement.body if item not in methods],
+                                  decorator_list=statement.decorator_list)
+            found[statement.name] = _dump(header)
+            for method in methods:
+                found[f"{statement.name}.{method.name}"] = _dump(method)
+        elif isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            found[statement.name] = _dump(statement)
+        else:
+            module.append(_dump(statement))
+    found["<module>"] = "\n".join(module)
+    return found
+
+
+# {qualified name: source lines} for the same definitions as definitions(),
+# a class's lines leaving out those of its methods
+def definition_lines(tree):
+    found = {"<module>": set()}
+
+    def lines(node):
+        return set(range(node.lineno, (node.end_lineno or node.lineno) + 1))
+
+    for statement in tree.body:
+        if isinstance(statement, ast.ClassDef):
+            found[statement.name] = lines(statement)
+            for method in statement.body:
+                if isinstance(method, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    found[f"{statement.name}.{method.name}"] = lines(method)
+                    found[statement.name] -= found[f"{statement.name}.{method.name}"]
+        elif isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            found[statement.name] = lines(statement)
+        else:
+            found["<module>"] |= lines(statement)
+    return found
+
+
+# Qualified names whose definition was added, removed or edited
+def changed_definitions(before, after):
+    return {name for name in before.keys() | after.keys() if before.get(name) != after.get(name)}
+
+
+# Qualified name of the innermost class or function around a site
+def site_scope(tree, site):
+    names = []
+    for path in site.paths:
+        scope = []
+        for length in range(1, len(path) + 1):
+            node = node_at(tree, path[:length])
+            if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                scope.append(node.name)
+        names.append(".".join(scope))
+    return names
+
+
+# Classes of the module a class inherits from, nearest first
+def _ancestors(classes, class_name):
+    seen, pending = [], list(classes.get(class_name, ((),))[0])
+    while pending:
+        name = pending.pop(0)
+        if name in classes and name not in seen and name != class_name:
+            seen.append(name)
+            pending.extend(classes[name][0])
+    return seen
+
+
+def _related(scope, name):
+    # A change to Dog touches Dog.__init__ and the other way round
+    return scope == name or scope.startswith(name + ".") or name.startswith(scope + ".")
+
+
+# Whether a test id ("Class.test_method") is affected by the changed test
+# definitions: the test itself, its class body, or setUp and other helper
+# methods its class shares between tests
+def _test_changed(test, changed_tests):
+    class_name = test.split(".")[0]
+    for name in changed_tests:
+        if name in (test, class_name):
+            return True
+        if name.startswith(class_name + ".") and not name.split(".", 1)[1].startswith("test"):
+            return True
+    return False
+
+
+# Long-lived mutation testing of one target and test module. The parsed
+# tree, the mutant results and the imported test module stay in memory; on
+# every save only the mutants in changed classes and functions (or in
+# subclasses of changed classes), those whose covering tests changed and
+# those whose covering tests run changed lines are re-run, and the score is
+# updated. A save that does not parse or import is skipped until the next
+# one. The fork runner, the default where os.fork exists, makes this process
+# the warm parent every mutant is forked from, so nothing is re-imported per
+# mutant
+class MutationDaemon:
+    def __init__(self, input_file, mutations, test_module="mutation_test", module_name="mutant", runner=DEFAULT_RUNNER,
+                 workers=None, timeout=10):
+        self.input_file = input_file
+        self.mutations = mutations
+        self.test_module = test_module
+        self.module_name = module_name
+        self.runner = runner
+        self.workers = workers
+        self.timeout = timeout
+        self.test_file = importlib.util.find_spec(test_module).origin
+        self.mtimes = {}
+        self.source_code = None
+        self.tree = None
+        self.target_definitions = {}
+        self.target_lines = {}
+        self.test_definitions = {}
+        self.coverage = {}
+        self.results = {}
+        # Files whose last save could not be imported; their edits are applied
+        # with the next save of either file
+        self.pending = set()
+
+    def _changed_files(self):
+        changed = []
+        for path in (self.input_file, self.test_file):
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                continue  # Mid atomic save; the new file shows up on a later poll
+            if self.mtimes.get(path) != mtime:
+                self.mtimes[path] = mtime
+                changed.append(path)
+        return changed
+
+    def _parse(self, path):
+        try:
+            with open(path, "r") as f:
+                source_code = f.read()
+            return source_code, ast.parse(source_code)
+        except (OSError, SyntaxError) as e:
+            print(f"{path} cannot be read, waiting for the next save: {e}")
+            return None
+
+    # Re-read whatever changed and re-run the affected mutants; returns the
+    # number re-run, or None when nothing changed
+    def update(self):
+        changed = self._changed_files()
+        if not changed:
+            return None
+        first_run = self.tree is None
+        if first_run:
+            changed = [self.input_file, self.test_file]
+        changed = [path for path in (self.input_file, self.test_file) if path in changed or path in self.pending]
+        parsed = {path: self._parse(path) for path in changed}
+        if None in parsed.values():
+            # Files that did parse are read again on the next poll, so their
+            # edits are not lost while the broken one waits for a save
+            for path, result in parsed.items():
+                if result is not None:
+                    self.mtimes.pop(path, None)
+            return 0
+
+        affected_names = set()
+        changed_tests = set()
+        old_lines = self.target_lines
+        if self.test_file in changed:
+            if self.test_module in sys.modules and not first_run:
+                try:
+                    importlib.reload(sys.modules[self.test_module])
+                except Exception as e:
+                    print(f"{self.test_file} cannot be imported, waiting for the next save: {e}")
+                    if self.input_file in changed:
+                        self.mtimes.pop(self.input_file, None)
+                    return 0
+            test_definitions = definitions(parsed[self.test_file][1])
+            changed_tests = changed_definitions(self.test_definitions, test_definitions)
+        source_code, tree = parsed.get(self.input_file, (self.source_code, self.tree))
+        if self.input_file in changed:
+            target_definitions = definitions(tree)
+            affected_names = changed_definitions(self.target_definitions, target_definitions)
+
+        # A save that parses can still fail once imported (a name error at
+        # module level, a bad import); nothing is kept from it, so the edits
+        # are compared against the last save that loaded
+        try:
+            coverage = collect_coverage(source_code, self.test_module, self.module_name)
+        except Exception as e:
+            print(f"{self.input_file} or its tests cannot be imported, waiting for the next save: {e}")
+            self.pending = set(changed)
+            return 0
+        self.pending = set()
+        if self.test_file in changed:
+            self.test_definitions = test_definitions
+        if self.input_file in changed:
+            self.source_code, self.tree, self.target_definitions = source_code, tree, target_definitions
+            self.target_lines = definition_lines(tree)
+        old_coverage, self.coverage = self.coverage, coverage
+        rerun_everything = first_run or "<module>" in affected_names or "<module>" in changed_tests
+        # Lines of the changed definitions before and after the edit: a test
+        # that ran any of them may behave differently against every mutant
+        changed_before = set().union(*(old_lines.get(name, ()) for name in affected_names))
+        changed_after = set().union(*(self.target_lines.get(name, ()) for name in affected_names))
+        classes = class_table(self.tree)
+
+        # Results are kept by operator and label rather than by id, as the id
+        # holds a line number that edits above the site change
+        jobs = []
+        current = {}
+        original_hash = tree_hash(self.tree)
+        for mutant in iter_mutants(self.source_code, self.mutations, tree=self.tree):
+            key = (mutant.operator, mutant.site.label)
+            tests = tests_for_site(coverage, self.tree, mutant.site)
+            current[key] = mutant.id
+            previous = self.results.get(key)
+            scopes = site_scope(self.tree, mutant.site)
+            # A site in Dog also depends on what Dog inherits from Animal
+            scopes += [ancestor for scope in scopes for ancestor in _ancestors(classes, scope.split(".")[0])]
+            stale = rerun_everything or previous is None \
+                or any(_related(scope, name) for scope in scopes for name in affected_names) \
+                or any(_test_changed(test, changed_tests) for test in tests) \
+                or previous.get("test") in changed_tests \
+                or any(coverage[test] & changed_after or old_coverage.get(test, frozenset()) & changed_before
+                       for test in tests)
+            if not stale:
+                previous["mutation"] = mutant.id
+                continue
+            mutated_tree = mutant.tree()
+            if tree_hash(mutated_tree) == original_hash:
+                self.results[key] = {"mutation": mutant.id, "status": "unchanged", "killed": False}
+                continue
+            jobs.append((mutant.id, tests, mutated_tree))
+
+        keys = {mutation: key for key, mutation in current.items()}
+        for result in run_mutants(jobs, self.runner, self.workers, self.timeout, self.test_module, self.tree,
+                                  self.module_name):
+            self.results[keys[result["mutation"]]] = result
+        # Mutants whose site went away with the edit are forgotten
+        self.results = {key: result for key, result in self.results.items() if key in current}
+        return len(jobs)
+
+    def watch(self, interval=0.2):
+        print(f"Watching {self.input_file} and {self.test_file}, Ctrl-C to stop")
+        try:
+            while True:
+                started = time.perf_counter()
+                rerun = self.update()
+                if rerun is not None:
+                    summary = summarize(list(self.results.values()))
+                    print(f"Re-ran {rerun} of {len(self.results)} mutants in {time.perf_counter() - started:.2f}s: "
+                          f"killed {summary['killed']}, survived {summary['survived']}, "
+                          f"score {summary['score']:.2f}%")
+                    sys.stdout.flush()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
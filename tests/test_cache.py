@@ -0,0 +1,112 @@
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mutation_cache import ResultCache, result_key, tree_hash
+from mutation_operators import mutation_operators
+from mutation_script import run_tests_for_mutations
+from mutation_sites import iter_mutants
+
+TARGET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "original_code.py")
+
+
+def result(status="killed", test="TestAnimalBehavior.test_get_info"):
+    return {"killed": status != "survived", "status": status, "test": test, "error": "AssertionError",
+            "duration": 0.01}
+
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="mutation_cache_")
+        with open(TARGET, "r") as f:
+            self.source_code = f.read()
+        self.mutants = list(iter_mutants(self.source_code, list(mutation_operators), cache_dir=None))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+class TestResultKey(CacheTestCase):
+    def test_the_key_changes_with_what_the_result_depends_on(self):
+        first, second = self.mutants[:2]
+        digest = tree_hash(first.tree())
+        key = result_key(digest, first.site, "suite", ["a", "b"])
+        self.assertEqual(key, result_key(digest, first.site, "suite", ["a", "b"]))
+        for other in (result_key(tree_hash(second.tree()), first.site, "suite", ["a", "b"]),
+                      result_key(digest, second.site, "suite", ["a", "b"]),
+                      result_key(digest, first.site, "edited suite", ["a", "b"]),
+                      result_key(digest, first.site, "suite", ["a"])):
+            self.assertNotEqual(key, other)
+
+    # Lines added above every site change each mutant id but not its key
+    def test_moving_code_down_keeps_the_key(self):
+        moved = list(iter_mutants("\n\n\n" + self.source_code, list(mutation_operators), cache_dir=None))
+        self.assertEqual(len(moved), len(self.mutants))
+        for before, after in zip(self.mutants, moved):
+            self.assertNotEqual(before.id, after.id)
+            self.assertEqual(result_key(tree_hash(before.tree()), before.site, "suite", ["a"]),
+                             result_key(tree_hash(after.tree()), after.site, "suite", ["a"]))
+
+
+class TestResultCache(CacheTestCase):
+    def open(self, max_entries=100000):
+        return ResultCache(os.path.join(self.directory, "results.sqlite"), max_entries)
+
+    def test_results_persist_across_runs(self):
+        cache = self.open()
+        self.assertIsNone(cache.get("key"))
+        cache.put("key", self.mutants[0].site, result())
+        cache.close()
+        cache = self.open()
+        self.assertEqual(cache.get("key"), result())
+        cache.close()
+
+    def test_timeouts_are_not_returned(self):
+        cache = self.open()
+        cache.put("key", self.mutants[0].site, result("timeout"))
+        self.assertIsNone(cache.get("key"))
+        cache.close()
+
+    def test_the_least_recently_used_are_evicted(self):
+        cache = self.open(max_entries=2)
+        for key in ("old", "used", "new"):
+            cache.put(key, self.mutants[0].site, result())
+        cache.get("used")
+        cache.close()
+        cache = self.open(max_entries=2)
+        self.assertEqual([key for key in ("old", "used", "new") if cache.get(key)], ["used", "new"])
+        cache.close()
+
+
+class TestCachedCampaign(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cwd = os.getcwd()
+        os.chdir(self.directory)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        super().tearDown()
+
+    def campaign(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return run_tests_for_mutations(input_file=TARGET, runner="inprocess", schedule=False).results
+
+    def test_a_second_run_comes_from_the_cache(self):
+        first, second = self.campaign(), self.campaign()
+        self.assertEqual([(result["mutation"], result["status"]) for result in second],
+                         [(result["mutation"], result["status"]) for result in first])
+        run = [result for result in second if result["status"] in ("killed", "survived") and not result.get("static")]
+        self.assertTrue(run)
+        self.assertTrue(all(result.get("cached") for result in run))
+        self.assertFalse(any(result.get("cached") for result in first))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import ast
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Imported as a module: pytest would collect a bare tests_for_site as a test
+import mutation_coverage
+from mutation_engine import run_mutant_test
+from mutation_operators import mutation_operators
+from mutation_sites import iter_mutants
+
+TARGET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "original_code.py")
+
+
+class TestCoverageSelection(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(TARGET, "r") as f:
+            cls.source_code = f.read()
+        cls.tree = ast.parse(cls.source_code)
+        with contextlib.redirect_stdout(io.StringIO()):
+            cls.coverage = mutation_coverage.collect_coverage(cls.source_code, "mutation_test", "mutant")
+        cls.mutants = list(iter_mutants(cls.source_code, list(mutation_operators), cache_dir=None, tree=cls.tree))
+
+    # Running only the covering tests kills exactly the mutants, with exactly
+    # the killing tests, that running the whole suite does
+    def test_selected_tests_give_the_same_verdicts(self):
+        for mutant in self.mutants:
+            selected = mutation_coverage.tests_for_site(self.coverage, self.tree, mutant.site)
+            full = run_mutant_test(mutant.id, list(self.coverage), mutant.tree(), fail_fast=False)
+            subset = run_mutant_test(mutant.id, selected, mutant.tree(), fail_fast=False)
+            self.assertEqual(subset["killed"], full["killed"], mutant.id)
+            self.assertEqual(set(subset["killing_tests"]), set(full["killing_tests"]), mutant.id)
+
+    def test_class_level_sites_run_the_whole_suite(self):
+        sites = [mutant.site for mutant in self.mutants if mutation_coverage.class_level(self.tree, mutant.site)]
+        self.assertTrue(sites)
+        for site in sites:
+            self.assertEqual(mutation_coverage.tests_for_site(self.coverage, self.tree, site), list(self.coverage))
+
+    def test_selection_narrows_method_sites(self):
+        selected = [mutation_coverage.tests_for_site(self.coverage, self.tree, mutant.site) for mutant in self.mutants]
+        self.assertTrue(any(len(tests) < len(self.coverage) for tests in selected))
+
+
+if __name__ == "__main__":
+    unittest.main()
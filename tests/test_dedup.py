@@ -0,0 +1,51 @@
+import ast
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mutation_cache import tree_hash
+from mutation_dedup import MutantDeduplicator
+from mutation_operators import mutation_operators
+from mutation_report import summarize
+from mutation_sites import iter_mutants
+
+TARGET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "original_code.py")
+
+
+class TestMutantDeduplicator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(TARGET, "r") as f:
+            cls.source_code = f.read()
+        cls.tree = ast.parse(cls.source_code)
+        cls.mutants = list(iter_mutants(cls.source_code, list(mutation_operators), cache_dir=None, tree=cls.tree))
+
+    def test_distinct_mutants_are_new(self):
+        deduplicator = MutantDeduplicator(self.tree)
+        self.assertEqual([deduplicator.check(mutant.id, tree_hash(mutant.tree())) for mutant in self.mutants],
+                         [None] * len(self.mutants))
+
+    # Reformatting and moving code around leaves the normalized AST as it was
+    def test_a_reformatted_original_is_unchanged(self):
+        deduplicator = MutantDeduplicator(self.tree)
+        reformatted = ast.parse("\n\n" + ast.unparse(self.tree).replace("\n", "\n\n"))
+        self.assertEqual(deduplicator.check("reformatted", tree_hash(reformatted)), "unchanged")
+
+    def test_a_repeated_mutant_is_a_duplicate_of_the_first(self):
+        deduplicator = MutantDeduplicator(self.tree)
+        first, second = self.mutants[:2]
+        deduplicator.check(first.id, tree_hash(first.tree()))
+        deduplicator.check(second.id, tree_hash(second.tree()))
+        moved = ast.parse("\n\n\n" + ast.unparse(second.tree()))
+        self.assertEqual(deduplicator.check("again", tree_hash(moved)), ("duplicate", second.id))
+
+    def test_skipped_mutants_are_left_out_of_the_score(self):
+        results = [{"mutation": "a", "status": "killed"}, {"mutation": "b", "status": "survived"},
+                   {"mutation": "c", "status": "unchanged"}, {"mutation": "d", "status": "duplicate"}]
+        self.assertEqual(summarize(results), {"killed": 1, "survived": 1, "skipped": 2, "score": 50.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+import ast
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mutation_engine import run_mutants
+from mutation_script import run_tests_for_mutations
+
+MODULE_NAME, TEST_MODULE = "engine_target", "engine_target_tests"
+
+# Child.step hides a Base.step that never returns, so deleting or bypassing
+# the override (OMD, ISI) gives a mutant that hangs
+TARGET = '''
+class Base:
+    def step(self):
+        while True:
+            pass
+
+
+class Child(Base):
+    def step(self):
+        return 1
+
+    def name(self):
+        return "child"
+'''
+
+TESTS = f'''
+import os
+import unittest
+
+from {MODULE_NAME} import *
+
+
+class TestChild(unittest.TestCase):
+    def test_name(self):
+        self.assertEqual(Child().name(), "child")
+
+    def test_step(self):
+        self.assertEqual(Child().step(), 1)
+
+    def test_name_again(self):
+        self.assertEqual(Child().name(), "child")
+
+    def test_exit(self):
+        if Child().name() == "exit":
+            os._exit(3)
+'''
+
+
+def replace_method(tree, method, body):
+    tree = ast.parse(ast.unparse(tree))
+    child = tree.body[1]
+    for index, item in enumerate(child.body):
+        if item.name == method:
+            child.body[index] = ast.parse(body).body[0]
+    return tree
+
+
+class EngineTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp(prefix="mutation_engine_")
+        with open(os.path.join(cls.directory, f"{MODULE_NAME}.py"), "w") as f:
+            f.write(TARGET)
+        with open(os.path.join(cls.directory, f"{TEST_MODULE}.py"), "w") as f:
+            f.write(TESTS)
+        sys.path.insert(0, cls.directory)
+        cls.tree = ast.parse(TARGET)
+
+    @classmethod
+    def tearDownClass(cls):
+        sys.path.remove(cls.directory)
+        for name in (MODULE_NAME, TEST_MODULE):
+            sys.modules.pop(name, None)
+        shutil.rmtree(cls.directory)
+
+    def run_jobs(self, jobs, runner, timeout=None, fail_fast=True):
+        results = run_mutants(jobs, runner, 2, timeout, TEST_MODULE, self.tree, MODULE_NAME, fail_fast)
+        return {result["mutation"]: result for result in results}
+
+    def jobs(self):
+        hang = replace_method(self.tree, "step", "def step(self):\n    return super().step()")
+        wrong = replace_method(self.tree, "name", "def name(self):\n    return 'dog'")
+        crash = replace_method(self.tree, "name", "def name(self):\n    return 'exit'")
+        tests = ["TestChild.test_name", "TestChild.test_step", "TestChild.test_name_again", "TestChild.test_exit"]
+        return [("hang", tests[1:], hang), ("wrong", tests, wrong), ("crash", tests[3:], crash),
+                ("same", tests, self.tree)]
+
+
+class TestKillSemantics(EngineTestCase):
+    def test_a_hanging_test_is_a_timeout_kill(self):
+        results = self.run_jobs(self.jobs(), "pool", timeout=0.5)
+        self.assertEqual((results["hang"]["status"], results["hang"]["test"]), ("timeout", "TestChild.test_step"))
+        self.assertTrue(results["hang"]["killed"])
+        # The worker that hung was replaced, so the jobs after it still ran
+        self.assertEqual(results["same"]["status"], "survived")
+        self.assertEqual(results["wrong"]["status"], "killed")
+
+    def test_a_dying_worker_kills_the_mutant(self):
+        result = self.run_jobs(self.jobs(), "pool", timeout=5)["crash"]
+        self.assertEqual((result["status"], result["crashed"]), ("killed", True))
+
+    def test_fail_fast_stops_at_the_first_killer(self):
+        first = self.run_jobs(self.jobs()[1:2], "inprocess")["wrong"]
+        self.assertEqual((first["tests"], first["killing_tests"]), (["TestChild.test_name"], ["TestChild.test_name"]))
+        every = self.run_jobs(self.jobs()[1:2], "inprocess", fail_fast=False)["wrong"]
+        self.assertEqual(every["tests"], self.jobs()[1][1])
+        self.assertEqual(every["killing_tests"], ["TestChild.test_name", "TestChild.test_name_again"])
+        self.assertEqual(every["test"], "TestChild.test_name")
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "the fork runner needs os.fork")
+class TestForkRunner(EngineTestCase):
+    def test_verdicts_match_the_pool(self):
+        verdicts = {runner: {mutation: (result["status"], result["test"])
+                             for mutation, result in self.run_jobs(self.jobs(), runner, timeout=0.5).items()}
+                    for runner in ("pool", "fork")}
+        self.assertEqual(verdicts["fork"], verdicts["pool"])
+        self.assertEqual(verdicts["fork"]["hang"], ("timeout", "TestChild.test_step"))
+
+    def test_a_dying_child_kills_the_mutant(self):
+        result = self.run_jobs(self.jobs(), "fork", timeout=5)["crash"]
+        self.assertEqual((result["status"], result["crashed"]), ("killed", True))
+
+    def test_children_do_not_change_the_parent(self):
+        self.run_jobs(self.jobs()[1:2], "fork")
+        self.assertEqual(sys.modules[MODULE_NAME].Child().name(), "child")
+
+
+class TestTimeoutsAreNotCached(EngineTestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        os.chdir(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(os.path.join(self.directory, ".mutation_cache"), ignore_errors=True)
+        os.chdir(self.cwd)
+
+    def campaign(self, timeout):
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = run_tests_for_mutations(input_file=f"{MODULE_NAME}.py", test_module=TEST_MODULE,
+                                              module_name=MODULE_NAME, timeout=timeout, schedule=False).results
+        return {result["mutation"]: result for result in results}
+
+    def test_a_longer_timeout_reruns_timed_out_mutants(self):
+        first = self.campaign(0.5)
+        timed_out = [mutation for mutation, result in first.items() if result["status"] == "timeout"]
+        self.assertTrue(timed_out)
+        second = self.campaign(1)
+        for mutation in timed_out:
+            self.assertFalse(second[mutation].get("cached"), mutation)
+            self.assertEqual(second[mutation]["error"], "Timed out after 1s")
+        # Every other run result came from the cache
+        rerun = [mutation for mutation, result in second.items()
+                 if result["status"] in ("killed", "survived") and not result.get("cached") and not result.get("static")]
+        self.assertEqual(rerun, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
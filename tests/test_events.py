@@ -0,0 +1,120 @@
+import asyncio
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mutation_events import EventBus, EventSink, JsonLinesSink
+from mutation_script import run_tests_for_mutations
+
+TARGET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "original_code.py")
+
+
+class RecordingSink(EventSink):
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.events = []
+        self.closed = None
+
+    async def write(self, events):
+        await asyncio.sleep(self.delay)
+        self.events.extend(events)
+
+    async def close(self, dropped):
+        self.closed = dropped
+
+
+class FailingSink(RecordingSink):
+    async def write(self, events):
+        raise OSError("the sink is gone")
+
+
+class TestEventBus(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="mutation_events_")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_every_event_reaches_every_sink_in_order(self):
+        path = os.path.join(self.directory, "events.jsonl")
+        sink = RecordingSink()
+        bus = EventBus([sink, JsonLinesSink(path)], batch_size=4)
+        for index in range(10):
+            bus.publish("killed", mutation=f"m{index}")
+        bus.close()
+        self.assertEqual([event["mutation"] for event in sink.events], [f"m{index}" for index in range(10)])
+        with open(path, "r") as f:
+            self.assertEqual([json.loads(line) for line in f], sink.events)
+        self.assertEqual(sink.closed, 0)
+
+    # A slow sink sheds progress events, never outcomes
+    def test_progress_events_are_dropped_first(self):
+        sink = RecordingSink(delay=0.05)
+        bus = EventBus([sink], batch_size=1, interval=0.01, max_pending=2)
+        for index in range(20):
+            bus.publish("started", mutation=f"m{index}")
+            bus.publish("killed", mutation=f"m{index}")
+        bus.close()
+        self.assertGreater(bus.dropped, 0)
+        self.assertEqual(sink.closed, bus.dropped)
+        self.assertEqual([event["mutation"] for event in sink.events if event["event"] == "killed"],
+                         [f"m{index}" for index in range(20)])
+
+    def test_a_sink_that_cannot_start_fails_the_constructor(self):
+        started = RecordingSink()
+        with self.assertRaises(OSError):
+            EventBus([started, JsonLinesSink(os.path.join(self.directory, "missing", "events.jsonl"))])
+        # Sinks started before the failing one are closed again
+        self.assertEqual(started.closed, 0)
+
+    def test_a_sink_that_fails_to_write_fails_publish_once(self):
+        sink = FailingSink()
+        bus = EventBus([sink], batch_size=1, interval=0.01)
+        with self.assertRaisesRegex(OSError, "the sink is gone"):
+            for index in range(1000):
+                bus.publish("killed", mutation=f"m{index}")
+                time.sleep(0.01)
+        # close() does not raise the error publish() already raised
+        bus.close()
+        self.assertEqual(sink.closed, 0)
+
+    def test_a_sink_that_fails_to_write_fails_close(self):
+        bus = EventBus([FailingSink()], interval=0.01)
+        bus.publish("killed", mutation="m0")
+        with self.assertRaisesRegex(OSError, "the sink is gone"):
+            bus.close()
+
+
+class TestCampaignEvents(unittest.TestCase):
+    def test_a_campaign_publishes_its_progress_and_outcomes(self):
+        sink = RecordingSink()
+        bus = EventBus([sink])
+        cwd = os.getcwd()
+        directory = tempfile.mkdtemp(prefix="mutation_events_")
+        os.chdir(directory)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = run_tests_for_mutations(input_file=TARGET, runner="inprocess", cache=False, schedule=False,
+                                                  events=bus).results
+        finally:
+            bus.close()
+            os.chdir(cwd)
+            shutil.rmtree(directory)
+        kinds = [event["event"] for event in sink.events]
+        self.assertEqual((kinds[0], kinds[-1]), ("campaign_started", "campaign_finished"))
+        outcomes = {event["mutation"]: event["event"] for event in sink.events
+                    if event["event"] in ("killed", "survived", "timeout")}
+        self.assertEqual(outcomes, {result["mutation"]: result["status"] for result in results})
+        self.assertEqual(sink.events[-1]["score"], 75.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
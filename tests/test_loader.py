@@ -0,0 +1,98 @@
+import ast
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mutant_loader
+from mutant_loader import load_baseline, load_incremental
+
+MODULE_NAME = "loader_target"
+
+SOURCE = '''
+REGISTRY = []
+
+
+class Base:
+    seen = []
+
+    def register(self):
+        Base.seen.append(self)
+        REGISTRY.append(self)
+        return "base"
+
+
+class Child(Base):
+    def register(self):
+        return "child:" + super().register()
+
+
+class Other:
+    count = 0
+'''
+
+MUTATED_BASE = '''
+class Base:
+    seen = []
+
+    def register(self):
+        Base.seen.append(self)
+        REGISTRY.append(self)
+        return "mutated"
+'''
+
+
+# A mutant of SOURCE that only replaces Base, sharing every other statement
+# with the original tree the way patch_tree does
+def mutated(original):
+    tree = ast.Module(body=list(original.body), type_ignores=[])
+    tree.body[1] = ast.parse(MUTATED_BASE).body[0]
+    return tree
+
+
+class TestLoadIncremental(unittest.TestCase):
+    def setUp(self):
+        self.tree = ast.parse(SOURCE)
+        self.baseline = load_baseline(self.tree, MODULE_NAME)
+
+    def tearDown(self):
+        mutant_loader._baselines.pop(MODULE_NAME, None)
+        sys.modules.pop(MODULE_NAME, None)
+
+    def test_class_state_does_not_leak_between_mutants(self):
+        first = load_incremental(mutated(self.tree), MODULE_NAME)
+        self.assertEqual(first.Child().register(), "child:mutated")
+        first.Other.count += 1
+        self.assertEqual((len(first.Base.seen), len(first.REGISTRY)), (1, 1))
+
+        second = load_incremental(mutated(self.tree), MODULE_NAME)
+        self.assertEqual((second.Base.seen, second.REGISTRY, second.Other.count), ([], [], 0))
+        self.assertIsNot(second.Other, first.Other)
+        self.assertEqual((self.baseline.Base.seen, self.baseline.REGISTRY, self.baseline.Other.count), ([], [], 0))
+
+    def test_unmutated_tree_is_rebuilt_too(self):
+        first = load_incremental(self.tree, MODULE_NAME)
+        first.Child().register()
+        second = load_incremental(self.tree, MODULE_NAME)
+        self.assertEqual(second.Base.seen, [])
+        self.assertIs(sys.modules[MODULE_NAME], second)
+
+    def test_share_reruns_only_the_change_and_its_dependents(self):
+        module = load_incremental(mutated(self.tree), MODULE_NAME, share=True)
+        self.assertEqual(module.Child().register(), "child:mutated")
+        self.assertIsNot(module.Base, self.baseline.Base)
+        # Child reads Base, so it is rebuilt on the mutated class
+        self.assertIsNot(module.Child, self.baseline.Child)
+        self.assertIs(module.Other, self.baseline.Other)
+        self.assertEqual(self.baseline.Child().register(), "child:base")
+
+    def test_without_baseline_loads_the_whole_module(self):
+        mutant_loader._baselines.pop(MODULE_NAME)
+        module = load_incremental(mutated(self.tree), MODULE_NAME)
+        self.assertEqual(module.Child().register(), "child:mutated")
+        self.assertIsNot(module.Other, self.baseline.Other)
+
+
+if __name__ == "__main__":
+    unittest.main()
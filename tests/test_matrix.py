@@ -0,0 +1,67 @@
+import importlib.util
+import io
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mutation_matrix import KillMatrix
+
+
+def random_matrix(seed, mutants=200, tests=70):
+    rng = random.Random(seed)
+    names = [f"T.test_{column}" for column in range(tests)]
+    matrix = KillMatrix(names)
+    for row in range(mutants):
+        # Few killers per mutant, so that subsumption actually happens
+        killers = [name for name in names if rng.random() < rng.choice((0.02, 0.05, 0.2))]
+        matrix.add(f"M{row}", killers)
+    return matrix
+
+
+class TestSubsumption(unittest.TestCase):
+    def test_definition(self):
+        for seed in range(5):
+            matrix = random_matrix(seed)
+            rows = dict(zip(matrix.mutants, matrix.rows))
+            dominators, subsumed, unkilled = matrix.subsumption(vectorized=False)
+
+            self.assertEqual(set(unkilled), {mutant for mutant, row in rows.items() if not row})
+            self.assertEqual(set(dominators) | set(subsumed) | set(unkilled), set(matrix.mutants))
+            self.assertFalse(set(dominators) & set(subsumed))
+            # Every subsumed mutant is killed by every test that kills its dominator
+            for mutant, dominator in subsumed.items():
+                self.assertIn(dominator, dominators)
+                self.assertEqual(rows[dominator] & rows[mutant], rows[dominator])
+            # No dominator is subsumed by another one
+            for first in dominators:
+                for second in dominators:
+                    if first != second:
+                        self.assertNotEqual(rows[first] & rows[second], rows[first])
+
+    def test_identical_rows_keep_the_first_mutant(self):
+        matrix = KillMatrix(["T.a", "T.b"])
+        matrix.add("first", ["T.a"])
+        matrix.add("second", ["T.a"])
+        matrix.add("wider", ["T.a", "T.b"])
+        self.assertEqual(matrix.subsumption(vectorized=False), (["first"], {"second": "first", "wider": "first"}, []))
+
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "numpy is not installed")
+    def test_numpy_matches_int_bitsets(self):
+        for seed in range(5):
+            matrix = random_matrix(seed)
+            self.assertEqual(matrix.subsumption(vectorized=True), matrix.subsumption(vectorized=False))
+
+    def test_round_trip(self):
+        matrix = random_matrix(0, mutants=20)
+        stream = io.StringIO()
+        matrix.write(stream)
+        stream.seek(0)
+        read = KillMatrix.read(stream)
+        self.assertEqual((read.tests, read.mutants, read.rows), (matrix.tests, matrix.mutants, matrix.rows))
+
+
+if __name__ == "__main__":
+    unittest.main()
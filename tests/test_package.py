@@ -0,0 +1,144 @@
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mutation_package import dependents, import_graph
+from mutation_script import run_tests_for_mutations
+
+ANIMALS = '''
+class Animal:
+    def __init__(self, name='Animal', age=0):
+        self.name = name
+        self._age = age
+
+    def make_sound(self):
+        return "Some generic animal sound"
+
+    def get_info(self):
+        return f"{self.name} is {self._age} years old."
+'''
+
+DOGS = '''
+class Dog(Animal):
+    def __init__(self, name, age, breed):
+        super().__init__(name, age)
+        self.breed = breed
+
+    def make_sound(self):
+        return "Bark!"
+
+    def get_info(self):
+        return f"{self.name} is a {self.breed} and {self._age} years old."
+'''
+
+# Only Dog is used, so every verdict on an Animal mutant goes through Dog
+# inheriting from it
+TESTS = '''
+import unittest
+
+from {module} import *
+
+
+class TestDog(unittest.TestCase):
+    def setUp(self):
+        self.dog = Dog("Buddy", 3, "Golden Retriever")
+
+    def test_sound(self):
+        self.assertEqual(self.dog.make_sound(), "Bark!")
+
+    def test_info(self):
+        self.assertEqual(self.dog.get_info(), "Buddy is a Golden Retriever and 3 years old.")
+
+    def test_age(self):
+        self.assertEqual(self.dog._age, 3)
+'''
+
+
+# {(operator, class.member): status} with the module and line left out of the id
+def verdicts(results):
+    found = {}
+    for result in results:
+        operator, _, rest = result["mutation"].partition(":")
+        label = rest.rpartition("@")[0]
+        for module in ("zoo.animals.", "zoo.dogs."):
+            if label.startswith(module):
+                label = label[len(module):]
+        found[(operator, label)] = result["status"]
+    return found
+
+
+class TestPackageMode(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp(prefix="mutation_package_")
+        os.makedirs(os.path.join(cls.directory, "zoo"))
+        files = {
+            "zoo/__init__.py": "from .animals import Animal\nfrom .dogs import Dog\n",
+            "zoo/animals.py": ANIMALS,
+            "zoo/dogs.py": "from .animals import Animal\n\n" + DOGS,
+            "zoo_tests.py": TESTS.format(module="zoo"),
+            "single_zoo.py": ANIMALS + "\n" + DOGS,
+            "single_zoo_tests.py": TESTS.format(module="single_zoo"),
+        }
+        for name, source in files.items():
+            with open(os.path.join(cls.directory, name), "w") as f:
+                f.write(source)
+        sys.path.insert(0, cls.directory)
+        cls.cwd = os.getcwd()
+        os.chdir(cls.directory)
+        with contextlib.redirect_stdout(io.StringIO()):
+            cls.package = run_tests_for_mutations(input_file="zoo", test_module="zoo_tests", runner="inprocess",
+                                                  cache=False).results
+            cls.single = run_tests_for_mutations(input_file="single_zoo.py", test_module="single_zoo_tests",
+                                                 module_name="single_zoo", runner="inprocess", cache=False,
+                                                 schedule=False).results
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.cwd)
+        while cls.directory in sys.path:
+            sys.path.remove(cls.directory)
+        for name in [name for name in sys.modules if name.split(".")[0] in ("zoo", "zoo_tests", "single_zoo",
+                                                                             "single_zoo_tests")]:
+            del sys.modules[name]
+        shutil.rmtree(cls.directory)
+
+    def test_verdicts_match_a_single_file(self):
+        package, single = verdicts(self.package), verdicts(self.single)
+        # PMD deletes a method from the whole hierarchy at once, which a
+        # hierarchy split over two modules gets as one mutant per module
+        shared = [key for key in package.keys() & single.keys() if key[0] != "PMD"
+                  and {package[key], single[key]} <= {"killed", "survived", "timeout"}]
+        self.assertIn(("PPD", "Animal.__init__"), shared)
+        self.assertIn(("PCD", "Animal"), shared)
+        for key in shared:
+            self.assertEqual(package[key], single[key], key)
+
+    def test_pmd_is_labelled_with_the_class_it_deletes_from(self):
+        ids = [result["mutation"] for result in self.package if result["mutation"].startswith("PMD:")]
+        self.assertIn("PMD:zoo.dogs.Dog.make_sound", [mutation.rpartition("@")[0] for mutation in ids])
+        self.assertFalse([mutation for mutation in ids if mutation.startswith("PMD:zoo.dogs.zoo.")])
+
+    def test_the_package_is_restored(self):
+        import zoo
+        import zoo.animals
+        import zoo.dogs
+        self.assertIs(sys.modules["zoo.animals"], zoo.animals)
+        self.assertIs(zoo.Dog, zoo.dogs.Dog)
+        self.assertIs(zoo.dogs.Dog.__bases__[0], zoo.animals.Animal)
+        self.assertIs(sys.modules["zoo_tests"].Dog, zoo.dogs.Dog)
+
+    def test_dependents_come_after_what_they_import(self):
+        graph = import_graph({"zoo": {"zoo.animals", "zoo.dogs"}, "zoo.animals": set(), "zoo.dogs": {"zoo.animals"},
+                              "zoo_tests": {"zoo"}})
+        self.assertEqual(dependents(graph, "zoo.animals"), ("zoo.dogs", "zoo", "zoo_tests"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import collections
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mutation_sampling import estimate_score, stratified_order
+
+Site = collections.namedtuple("Site", ["operator", "id"])
+
+SIZES = {"IHD": 7, "IOD": 40, "PNC": 13, "AMC": 100}
+
+
+def population_items():
+    return [(Site(operator, f"{operator}:{number}"), []) for operator, size in SIZES.items() for number in range(size)]
+
+
+def result(site, killed):
+    return {"mutation": site.id, "status": "killed" if killed else "survived"}
+
+
+class TestStratifiedOrder(unittest.TestCase):
+    def test_every_prefix_is_proportional(self):
+        order = stratified_order(population_items(), seed=3)
+        self.assertEqual(sorted(site.id for site, _ in order), sorted(site.id for site, _ in population_items()))
+        taken = collections.Counter()
+        for length, (site, _) in enumerate(order, 1):
+            taken[site.operator] += 1
+            # No stratum is more than one mutant ahead of the share of any other
+            lowest = min(taken[operator] / size for operator, size in SIZES.items())
+            for operator, size in SIZES.items():
+                self.assertLessEqual((taken[operator] - 1) / size, lowest, (length, operator))
+
+    def test_seed_fixes_the_order(self):
+        first = [site.id for site, _ in stratified_order(population_items(), seed=1)]
+        self.assertEqual(first, [site.id for site, _ in stratified_order(population_items(), seed=1)])
+        self.assertNotEqual(first, [site.id for site, _ in stratified_order(population_items(), seed=2)])
+
+
+class TestEstimateScore(unittest.TestCase):
+    def setUp(self):
+        generator = random.Random(0)
+        rates = {"IHD": 0.2, "IOD": 0.9, "PNC": 0.5, "AMC": 0.7}
+        self.killed = {site.id: generator.random() < rates[site.operator] for site, _ in population_items()}
+        self.true_score = sum(self.killed.values()) / len(self.killed) * 100
+
+    def test_census_is_exact(self):
+        estimate = estimate_score([result(site, self.killed[site.id]) for site, _ in population_items()], SIZES)
+        self.assertAlmostEqual(estimate["score"], self.true_score)
+        self.assertAlmostEqual(estimate["low"], estimate["high"])
+        self.assertEqual((estimate["sampled"], estimate["population"], estimate["unsampled"]), (160, 160, {}))
+
+    def test_interval_covers_the_true_score(self):
+        covered = 0
+        for seed in range(200):
+            sample = stratified_order(population_items(), seed)[:40]
+            estimate = estimate_score([result(site, self.killed[site.id]) for site, _ in sample], SIZES)
+            covered += estimate["low"] <= self.true_score <= estimate["high"]
+        self.assertGreaterEqual(covered / 200, 0.9)
+
+    def test_unsampled_operators_are_left_out(self):
+        sample = [(site, tests) for site, tests in population_items() if site.operator != "IHD"][::5]
+        estimate = estimate_score([result(site, self.killed[site.id]) for site, _ in sample], SIZES)
+        self.assertEqual(estimate["unsampled"], {"IHD": 7})
+        self.assertEqual(estimate["population"], 153)
+        self.assertNotIn("IHD", estimate["strata"])
+
+    def test_unscored_results_are_ignored(self):
+        site = Site("IOD", "IOD:0")
+        estimate = estimate_score([result(site, True), {"mutation": "IOD:1", "status": "duplicate"}], {"IOD": 40})
+        self.assertEqual(estimate["sampled"], 1)
+
+    def test_confidence_must_be_a_probability(self):
+        for confidence in (0, 1, 1.5, -0.1):
+            with self.assertRaises(ValueError):
+                estimate_score([], SIZES, confidence)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import ast
+import contextlib
+import importlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mutation_coverage import list_tests
+from mutation_engine import run_mutants
+from mutation_operators import mutation_operators
+from mutation_schema import build_schema
+from mutation_script import parse_args, run_tests_for_mutations
+from mutation_sites import iter_mutants
+
+TARGET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "original_code.py")
+
+
+class TestSchemaHolds(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(TARGET, "r") as f:
+            cls.source_code = f.read()
+        cls.tree = ast.parse(cls.source_code)
+        cls.mutants = {mutant.id: mutant for mutant in
+                       iter_mutants(cls.source_code, list(mutation_operators), cache_dir=None, tree=cls.tree)}
+        cls.schema_tree, cls.held = build_schema(cls.tree, cls.mutants.values())
+        cls.tests = list_tests(importlib.import_module("mutation_test"))
+
+    def test_only_body_mutants_are_held(self):
+        self.assertTrue(self.held)
+        for mutation in self.held:
+            self.assertNotIn(mutation.partition(":")[0], ("PMD", "OMD", "PPD"), mutation)
+        self.assertTrue([mutation for mutation in self.mutants if mutation.startswith("PMD:")])
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "schemata need the fork runner")
+class TestSchemaVerdicts(TestSchemaHolds):
+    def run_jobs(self, jobs, tree):
+        return {result["mutation"]: result["status"]
+                for result in run_mutants(jobs, "fork", 2, 5, "mutation_test", tree, "mutant")}
+
+    # Switching a mutant on in the schema module gives the verdict loading
+    # that mutant on its own does
+    def test_activation_matches_loading(self):
+        switched = self.run_jobs([(mutation, self.tests, None) for mutation in self.held], self.schema_tree)
+        loaded = self.run_jobs([(mutation, self.tests, self.mutants[mutation].tree()) for mutation in self.held],
+                               self.tree)
+        self.assertEqual(switched, loaded)
+        self.assertIn("killed", switched.values())
+
+    def test_no_mutant_switched_on_is_the_original(self):
+        self.assertEqual(self.run_jobs([("original", self.tests, None)], self.schema_tree),
+                         self.run_jobs([("original", self.tests, self.tree)], self.tree))
+
+    def test_a_schema_campaign_matches_a_plain_one(self):
+        def campaign(schema):
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = run_tests_for_mutations(input_file=TARGET, runner="fork", cache=False, schedule=False,
+                                                  schema=schema).results
+            return {result["mutation"]: result["status"] for result in results}
+
+        self.assertEqual(campaign(True), campaign(False))
+
+
+class TestSchemaNeedsFork(unittest.TestCase):
+    def test_other_runners_are_refused(self):
+        for runner in ("pool", "inprocess"):
+            with self.assertRaises(ValueError):
+                run_tests_for_mutations(input_file=TARGET, runner=runner, cache=False, schema=True)
+            with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+                parse_args(["--target", TARGET, "--schema", "--runner", runner])
+
+
+if __name__ == "__main__":
+    unittest.main()
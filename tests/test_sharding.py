@@ -0,0 +1,114 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mutation_operators import mutation_operators
+from mutation_report import merge_results, summarize, write_json
+from mutation_script import parse_args, run_batch, run_tests_for_mutations
+from mutation_sites import iter_mutants, parse_shard, source_hash
+
+TARGET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "original_code.py")
+
+
+class TestShards(unittest.TestCase):
+    def setUp(self):
+        # The campaigns keep their site index under the working directory
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp(prefix="mutation_shards_")
+        os.chdir(self.directory)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+
+    def campaign(self, shard=None):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return run_tests_for_mutations(input_file=TARGET, runner="inprocess", cache=False, schedule=False,
+                                           shard=shard).results
+
+    # The JSON report of one shard, as `--shard i/N --format json` writes it
+    def report(self, shard, results=None, operators=None, source_code=None):
+        if source_code is None:
+            with open(TARGET, "r") as f:
+                source_code = f.read()
+        path = os.path.join(self.directory, f"shard{shard[0]}of{shard[1]}.json")
+        with open(path, "w") as f:
+            write_json(self.campaign(shard) if results is None else results, f, TARGET, "mutation_test", shard=shard,
+                       operators=operators or list(mutation_operators), source_hash=source_hash(source_code))
+        return path
+
+    def test_shards_partition_the_sites(self):
+        with open(TARGET, "r") as f:
+            source_code = f.read()
+        everything = [(mutant.index, mutant.id) for mutant in iter_mutants(source_code, list(mutation_operators))]
+        for count in (1, 2, 3, 7):
+            shards = [[(mutant.index, mutant.id) for mutant in iter_mutants(source_code, list(mutation_operators),
+                                                                            shard=(index, count))]
+                      for index in range(1, count + 1)]
+            self.assertEqual(sorted(sum(shards, [])), everything)
+
+    def test_merge_matches_a_single_run(self):
+        single = self.campaign()
+        merged = merge_results([self.report((index, 3)) for index in (2, 3, 1)])
+        self.assertEqual([(result["mutation"], result["status"]) for result in merged],
+                         [(result["mutation"], result["status"]) for result in single])
+        self.assertEqual(summarize(merged), summarize(single))
+
+    def test_merge_rejects_an_incomplete_or_repeated_set(self):
+        first, second = self.report((1, 2)), self.report((2, 2))
+        with self.assertRaisesRegex(ValueError, "both shard 1/2"):
+            merge_results([first, first])
+        with self.assertRaisesRegex(ValueError, "2/2 are missing"):
+            merge_results([first])
+        with self.assertRaisesRegex(ValueError, "different campaigns"):
+            merge_results([first, second, self.report((3, 3), [])])
+
+    def test_merge_rejects_shards_of_other_operators_or_sources(self):
+        first = self.report((1, 2))
+        with self.assertRaisesRegex(ValueError, "different operators or target sources"):
+            merge_results([first, self.report((2, 2), [], operators=["PMD"])])
+        with self.assertRaisesRegex(ValueError, "different operators or target sources"):
+            merge_results([first, self.report((2, 2), [], source_code="class Edited:\n    pass\n")])
+        with open(first, "r") as f:
+            report = json.load(f)
+        del report["source_hash"]
+        with open(first, "w") as f:
+            json.dump(report, f)
+        with self.assertRaisesRegex(ValueError, "does not record the operators and source"):
+            merge_results([first, self.report((2, 2))])
+
+    def test_a_shard_run_records_its_operators_and_source(self):
+        path = os.path.join(self.directory, "shard.json")
+        args = parse_args(["--target", TARGET, "--shard", "1/2", "--operators", "PMD,OMD", "--runner", "inprocess",
+                           "--format", "json", "--output", path, "--no-cache"])
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(run_batch(args), 0)
+        with open(path, "r") as f:
+            report = json.load(f)
+        with open(TARGET, "r") as f:
+            self.assertEqual((report["shard"], report["operators"], report["source_hash"]),
+                             ("1/2", ["PMD", "OMD"], source_hash(f.read())))
+
+    def test_merge_rejects_an_unsharded_report(self):
+        path = os.path.join(self.directory, "single.json")
+        with open(path, "w") as f:
+            write_json(self.campaign(), f, TARGET, "mutation_test")
+        with open(path, "r") as f:
+            self.assertNotIn("shard", json.load(f))
+        with self.assertRaisesRegex(ValueError, "not the report of a --shard run"):
+            merge_results([path])
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/5"), (2, 5))
+        for value in ("0/2", "3/2"):
+            with self.assertRaises(ValueError):
+                parse_shard(value)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import ast
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_mutation import synthetic_target, synthetic_tests
+from mutation_coverage import collect_coverage
+from mutation_engine import run_mutant_test
+from mutation_operators import mutation_operators
+from mutation_sites import iter_mutants
+from mutation_static import StaticAnalyzer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# (mutant id, test, reason) for every static verdict on a target, after
+# checking that the test it names really fails on the mutant
+def static_verdicts(case, source_code, test_module, module_name):
+    with contextlib.redirect_stdout(io.StringIO()):
+        tests = list(collect_coverage(source_code, test_module, module_name))
+    tree = ast.parse(source_code)
+    with open(importlib.util.find_spec(test_module).origin, "r") as f:
+        analyzer = StaticAnalyzer(f.read(), tree, module_name)
+    verdicts = []
+    for mutant in iter_mutants(source_code, list(mutation_operators), cache_dir=None, tree=tree):
+        verdict = analyzer.check(mutant.tree(), tests)
+        if verdict is None:
+            continue
+        test, reason = verdict
+        result = run_mutant_test(mutant.id, [test], mutant.tree(), test_module, module_name=module_name)
+        case.assertTrue(result["killed"], f"{mutant.id} was statically killed by {test} ({reason}) but survives it")
+        verdicts.append((mutant.id, test, reason))
+    return verdicts
+
+
+# A static kill must never be a mutant the named test does not kill when run
+class TestStaticSoundness(unittest.TestCase):
+    def test_sample_target(self):
+        with open(os.path.join(ROOT, "original_code.py"), "r") as f:
+            source_code = f.read()
+        self.assertTrue(static_verdicts(self, source_code, "mutation_test", "mutant"))
+
+    def test_synthetic_target(self):
+        directory = tempfile.mkdtemp(prefix="mutation_static_")
+        module_name, test_module = "static_target", "static_target_tests"
+        source_code = synthetic_target(12)
+        with open(os.path.join(directory, f"{module_name}.py"), "w") as f:
+            f.write(source_code)
+        with open(os.path.join(directory, f"{test_module}.py"), "w") as f:
+            f.write(synthetic_tests(source_code, module_name))
+        sys.path.insert(0, directory)
+        try:
+            self.assertTrue(static_verdicts(self, source_code, test_module, module_name))
+        finally:
+            sys.path.remove(directory)
+            for name in (module_name, test_module):
+                sys.modules.pop(name, None)
+
+    def test_tests_failing_on_the_original_are_not_trusted(self):
+        source_code = "class Animal:\n    def __init__(self, name):\n        self.name = name\n"
+        tree = ast.parse(source_code)
+        test_source = ("import unittest\nfrom mutant import *\n\n"
+                       "class T(unittest.TestCase):\n"
+                       "    def test_broken(self):\n        Animal()\n\n"
+                       "    def test_fine(self):\n        Animal('a')\n")
+        analyzer = StaticAnalyzer(test_source, tree, "mutant")
+        mutated = ast.parse("class Animal:\n    def __init__(self):\n        self.name = 'a'\n")
+        self.assertEqual(analyzer.check(mutated, ["T.test_broken"]), None)
+        self.assertEqual(analyzer.check(mutated, ["T.test_broken", "T.test_fine"])[0], "T.test_fine")
+
+
+if __name__ == "__main__":
+    unittest.main()
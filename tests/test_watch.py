@@ -0,0 +1,102 @@
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mutation_operators import mutation_operators
+from mutation_watch import MutationDaemon
+
+MODULE_NAME, TEST_MODULE = "watch_target", "watch_target_tests"
+
+TARGET = '''
+class Animal:
+    def __init__(self, name):
+        self.name = name
+
+    def make_sound(self):
+        return "Some generic animal sound"
+
+
+class Dog(Animal):
+    def make_sound(self):
+        return "Bark!"
+'''
+
+TESTS = f'''
+import unittest
+
+from {MODULE_NAME} import *
+
+
+class TestDog(unittest.TestCase):
+    def test_sound(self):
+        self.assertEqual(Dog("Buddy").make_sound(), "Bark!")
+
+    def test_name(self):
+        self.assertEqual(Dog("Buddy").name, "Buddy")
+'''
+
+
+class TestBrokenSaves(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="mutation_watch_")
+        self.target = os.path.join(self.directory, f"{MODULE_NAME}.py")
+        self.save(TARGET)
+        with open(os.path.join(self.directory, f"{TEST_MODULE}.py"), "w") as f:
+            f.write(TESTS)
+        sys.path.insert(0, self.directory)
+        self.daemon = MutationDaemon(self.target, list(mutation_operators), TEST_MODULE, MODULE_NAME,
+                                     runner="inprocess")
+        self.assertGreater(self.update(), 0)
+        self.results = dict(self.daemon.results)
+
+    def tearDown(self):
+        sys.path.remove(self.directory)
+        for name in (MODULE_NAME, TEST_MODULE):
+            sys.modules.pop(name, None)
+        shutil.rmtree(self.directory)
+
+    # Each save gets a later mtime than the last, however coarse the clock
+    def save(self, source):
+        with open(self.target, "w") as f:
+            f.write(source)
+        mtime = getattr(self, "mtime", os.stat(self.target).st_mtime_ns) + 10 ** 9
+        os.utime(self.target, ns=(mtime, mtime))
+        self.mtime = mtime
+
+    def update(self):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            rerun = self.daemon.update()
+        self.output = output.getvalue()
+        return rerun
+
+    def assert_waits(self):
+        self.assertEqual(self.update(), 0)
+        self.assertIn("waiting for the next save", self.output)
+        self.assertEqual(self.daemon.results, self.results)
+        self.assertIsNone(self.update())
+
+    def assert_recovers(self):
+        self.save(TARGET.replace('"Bark!"', '"Woof!"'))
+        self.assertGreater(self.update(), 0)
+        self.assertIn('"Woof!"', self.daemon.source_code)
+
+    def test_a_save_that_does_not_parse_waits(self):
+        self.save(TARGET + "\nclass Cat(Animal:\n")
+        self.assert_waits()
+        self.assert_recovers()
+
+    def test_a_save_that_does_not_import_waits(self):
+        self.save(TARGET + "\nundefined_name.attr\n")
+        self.assert_waits()
+        self.assertNotIn("undefined_name", self.daemon.source_code)
+        self.assert_recovers()
+
+
+if __name__ == "__main__":
+    unittest.main()